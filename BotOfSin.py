@@ -1,7 +1,10 @@
 # Imports
+import asyncio
+import hashlib
 import json
 import discord
 from discord.ext import commands
+from cogs.Metrics import InstrumentedTree
 
 # Load config for Token/ID Setup
 with open("config.json", "r") as f:
@@ -12,18 +15,68 @@ GUILD_ID = CONFIG["GUILD_ID"]
 CHANNEL_ID = CONFIG["CHANNEL_ID"]
 
 
+# Cogs are independent of each other and loaded concurrently
+EXTENSIONS = ("cogs.Paginators", "cogs.CTFFunctions", "cogs.RSS", "cogs.Stats")
+COMMAND_HASH_KEY = "command_tree_hash"
+
+class SinBot(commands.Bot):
+    async def setup_hook(self):
+        await sync_commands(self, discord.Object(id=GUILD_ID), CONFIG.get("FORCE_COMMAND_SYNC", False))
+
 intents = discord.Intents.default()
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = SinBot(command_prefix="!", intents=intents, tree_cls=InstrumentedTree)
+
+# ------------------ Command Sync ------------------
+def command_tree_hash(bot: commands.Bot, guild: discord.Object) -> str:
+    '''
+    Hashes the payload a guild sync would upload
+
+    Args:
+        bot (commands.Bot): Bot with every extension loaded
+        guild (discord.Object): Guild the commands are registered to
+
+    Returns:
+        str: Hex digest, changes whenever a command, option or permission does
+    '''
+
+    payload = sorted(
+        (command.to_dict(bot.tree) for command in bot.tree.get_commands(guild=guild)),
+        key=lambda command: (command.get("type", 1), command["name"]),
+    )
+    blob = json.dumps([bot.application_id, guild.id, payload], sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+async def sync_commands(bot: commands.Bot, guild: discord.Object, force: bool = False):
+    '''
+    Syncs the guild's commands only when they differ from the last successful sync
+
+    Runs once from setup_hook, so reconnects never sync. Set FORCE_COMMAND_SYNC
+    in config.json if the commands were changed from outside the bot.
+
+    Args:
+        bot (commands.Bot): Logged in bot with every extension loaded
+        guild (discord.Object): Guild the commands are registered to
+        force (Optional [bool]): True to sync even when the hash matches
+    '''
+
+    from cogs.Storage import db, get_state, set_state
+
+    digest = command_tree_hash(bot, guild)
+    if not force and await db.read(get_state, COMMAND_HASH_KEY) == digest:
+        print(f"Commands unchanged, skipping sync to guild {guild.id}")
+        return
+    try:
+        synced = await bot.tree.sync(guild=guild)
+        await db.write(set_state, COMMAND_HASH_KEY, digest)
+        print(f"Synced {len(synced)} commands to guild {guild.id}")
+    except Exception as e:
+        print(f"Sync error: {e}")
+# ------------------ Command Sync End ------------------
 
 # Logging
 @bot.event
 async def on_ready():
     print(f"Logged in as {bot.user}")
-    try:
-        synced = await bot.tree.sync(guild=discord.Object(id=GUILD_ID))
-        print(f"Synced {len(synced)} commands to guild {GUILD_ID}")
-    except Exception as e:
-        print(f"Sync error: {e}")
 
 async def main():
     '''
@@ -32,11 +85,20 @@ async def main():
     /ping: Sanity Check 
     /week: Shows CTFs happening within 7 days
     /month: Shows CTFs happening within the current month
+    /ctfs [days] [past]: Shows CTFs within a number of days ahead of (or behind) now
     
 
     /addctf <ctf>: Adds a given CTF to the queue DB
     /queue: Dumps the queue DB
     /dequeue <ctf>: Removes a CTF from the queue DB
+    /ctfthreads: Creates or updates a forum thread for every queued CTF in FORUM_CHANNEL_ID (manage threads only)
+
+    /news: Pages through the latest entries from every news source
+    /latest <feed> [days]: Pages through the stored entries of one feed
+    /search <feed> <query>: Searches the stored entries of one feed
+    /feed add <url> <name> [style] [retention_days]: Registers a news feed after one test fetch, entries are kept for good unless retention_days is given (admin only)
+    /feed remove <feed>: Unregisters a feed and deletes its entries (admin only)
+    /feed list: Shows every registered feed (admin only)
 
     /portarticles: Shows all portswigger articles from a given a date
     /portsearch: Searches all portswigger articles for a given term
@@ -44,12 +106,25 @@ async def main():
     /cybersearch: Searches all CyberWire Daily episodes for a given term
     /ctbepisodes: Shows all ctbb episodes from a given a date
     /ctbsearch: Searches all ctbb episodes for a given term
+
+    /stats: Latency percentiles and counters (admin only)
     '''
     
-    await bot.load_extension("cogs.CTFFunctions")
-    await bot.load_extension("cogs.RSS")
-    await bot.start(DISCORD_TOKEN)
+    from cogs.FetchUtils import close_session
+    from cogs.FeedUtils import feed_cache
+    from cogs.Storage import db
+
+    feed_cache.ttl = CONFIG.get("FEED_CACHE_TTL", feed_cache.ttl)
+    feed_cache.maxsize = CONFIG.get("FEED_CACHE_SIZE", feed_cache.maxsize)
+
+    # Entering the bot first sets up its loop state, so cog tasks can wait_until_ready right away
+    async with bot:
+        await asyncio.gather(*(bot.load_extension(name) for name in EXTENSIONS))
+        try:
+            await bot.start(DISCORD_TOKEN)
+        finally:
+            await close_session()
+            await db.close()
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
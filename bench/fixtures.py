@@ -0,0 +1,193 @@
+# Imports
+import random
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+# ------------------ Fixture Generation ------------------
+# Every feed is built from a seeded RNG so runs compare like for like
+BASE_DATE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+WORDS = (
+    "xss csrf ssrf deserialization prototype pollution race condition cache poisoning request smuggling "
+    "oauth jwt graphql websocket sandbox escape kernel heap overflow bypass exploit chain research"
+).split()
+FORMATS = ("Jeopardy", "Attack-Defense", "Hack quest", "Mixed")
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+def html_summary(rng: random.Random, paragraphs: int = 3) -> str:
+    '''
+    Builds an HTML summary like the ones research and podcast feeds ship
+    '''
+
+    parts = [f"<p>{sentence(rng, 30)} <a href='https://example.com/{rng.randrange(10**6)}'>link</a></p>" for _ in range(paragraphs)]
+    parts.append(f"<ul><li>{sentence(rng, 6)}</li><li>{sentence(rng, 6)}</li></ul>")
+    return "\n\n".join(parts)
+
+def ctbb_summary(rng: random.Random) -> str:
+    '''
+    Builds a CTBB style summary, show notes followed by a ==== footer of sponsor links
+    '''
+
+    notes = html_summary(rng, 2)
+    footer = "<br>".join(f"Sponsor {i}: https://sponsor{i}.example.com" for i in range(8))
+    return f"{notes}<p>====================</p><p>{footer}</p>"
+
+def show_notes(rng: random.Random, segments: int = 40) -> str:
+    '''
+    Builds long podcast show notes, a timestamped segment list with links and a ==== footer
+    '''
+
+    intro = html_summary(rng, 2)
+    items = "".join(
+        f"<li>[{i // 2:02d}:{i % 2 * 30:02d}] {sentence(rng, 12)} "
+        f"<a href='https://example.com/notes/{rng.randrange(10**6)}'>{sentence(rng, 3)}</a></li>"
+        for i in range(segments)
+    )
+    footer = "<br>".join(f"Sponsor {i}: https://sponsor{i}.example.com" for i in range(8))
+    return f"{intro}<h3>Timestamps</h3><ul>{items}</ul><p>====================</p><p>{footer}</p>"
+
+def ctf_summary(rng: random.Random, start: datetime, index: int) -> str:
+    '''
+    Builds a CTFtime style summary with its Label: value lines
+    '''
+
+    lines = [
+        f"Name: Bench CTF {index}",
+        f"Date: {start:%d %B %Y, %H:%M} UTC",
+        f"Format: {rng.choice(FORMATS)}",
+        "On-line: true",
+        f"Official URL: https://ctf{index}.example.com",
+        f"Rating weight: {rng.uniform(0, 100):.2f}",
+        f"Weight: {rng.uniform(0, 100):.2f}",
+        f"Event organizers: team{rng.randrange(500)}",
+    ]
+    return "<br />\n".join(lines)
+
+def generate_rss(count: int, podcast: bool = False, ctbb: bool = False, seed: int = 1) -> bytes:
+    '''
+    Generates an RSS 2.0 feed, newest item first
+
+    Args:
+        count (int): Number of items
+        podcast (Optional [bool]): Add enclosures and itunes tags like a podcast feed
+        ctbb (Optional [bool]): Use CTBB style summaries with the footer
+        seed (Optional [int]): RNG seed
+
+    Returns:
+        bytes: The feed document
+    '''
+
+    rng = random.Random(seed)
+    items = []
+    for i in range(count - 1, -1, -1):
+        published = BASE_DATE + timedelta(hours=12 * i)
+        summary = ctbb_summary(rng) if ctbb else html_summary(rng)
+        extra = ""
+        if podcast:
+            extra = (
+                f"<enclosure url='https://cdn.example.com/ep{i}.mp3' length='{rng.randrange(10**8)}' type='audio/mpeg'/>"
+                f"<itunes:title>Episode {i}</itunes:title><itunes:duration>{rng.randrange(600, 7200)}</itunes:duration>"
+                f"<itunes:summary>{escape(sentence(rng, 20))}</itunes:summary>"
+            )
+        items.append(
+            f"<item><title>{escape(sentence(rng, 8))} #{i}</title>"
+            f"<link>https://example.com/posts/{i}</link>"
+            f"<guid isPermaLink='false'>bench-{seed}-{i}</guid>"
+            f"<pubDate>{format_datetime(published)}</pubDate>"
+            f"<description>{escape(summary)}</description>{extra}</item>"
+        )
+
+    return (
+        "<?xml version='1.0' encoding='UTF-8'?>"
+        "<rss version='2.0' xmlns:itunes='http://www.itunes.com/dtds/podcast-1.0.dtd'><channel>"
+        "<title>Bench Feed</title><link>https://example.com</link><description>Synthetic feed</description>"
+        + "".join(items)
+        + "</channel></rss>"
+    ).encode()
+
+def generate_atom(count: int, seed: int = 1) -> bytes:
+    '''
+    Generates an Atom feed, newest entry first
+
+    Args:
+        count (int): Number of entries
+        seed (Optional [int]): RNG seed
+
+    Returns:
+        bytes: The feed document
+    '''
+
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count - 1, -1, -1):
+        updated = (BASE_DATE + timedelta(hours=12 * i)).isoformat()
+        entries.append(
+            f"<entry><title>{escape(sentence(rng, 8))} #{i}</title>"
+            f"<link rel='alternate' href='https://example.com/atom/{i}'/>"
+            f"<id>urn:bench:{seed}:{i}</id><updated>{updated}</updated>"
+            f"<summary type='html'>{escape(html_summary(rng))}</summary></entry>"
+        )
+
+    return (
+        "<?xml version='1.0' encoding='UTF-8'?>"
+        "<feed xmlns='http://www.w3.org/2005/Atom'><title>Bench Atom</title>"
+        f"<id>urn:bench:{seed}</id><updated>{BASE_DATE.isoformat()}</updated>"
+        + "".join(entries)
+        + "</feed>"
+    ).encode()
+
+def generate_ctf_feed(count: int, seed: int = 1) -> bytes:
+    '''
+    Generates a CTFtime style event feed
+
+    Args:
+        count (int): Number of events
+        seed (Optional [int]): RNG seed
+
+    Returns:
+        bytes: The feed document
+    '''
+
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        start = BASE_DATE + timedelta(days=i % 365, hours=rng.randrange(24))
+        items.append(
+            f"<item><title>Bench CTF {i}</title>"
+            f"<link>https://ctftime.org/event/{100000 + i}/</link>"
+            f"<guid>https://ctftime.org/event/{100000 + i}/</guid>"
+            f"<start_date>{start:%Y%m%dT%H%M%S}</start_date>"
+            f"<finish_date>{start + timedelta(days=2):%Y%m%dT%H%M%S}</finish_date>"
+            f"<description>{escape(ctf_summary(rng, start, i))}</description></item>"
+        )
+
+    return (
+        "<?xml version='1.0' encoding='UTF-8'?><rss version='2.0'><channel>"
+        "<title>CTFtime: Upcoming CTFs</title><link>https://ctftime.org/</link>"
+        + "".join(items)
+        + "</channel></rss>"
+    ).encode()
+
+def build_fixtures(sizes):
+    '''
+    Generates every fixture for the given sizes
+
+    Args:
+        sizes (list): Item counts, e.g. [10, 1000, 10000]
+
+    Returns:
+        dict: URL path -> feed body
+    '''
+
+    fixtures = {}
+    for size in sizes:
+        fixtures[f"/rss/{size}.xml"] = generate_rss(size, seed=size)
+        fixtures[f"/podcast/{size}.xml"] = generate_rss(size, podcast=True, seed=size + 1)
+        fixtures[f"/ctbb/{size}.xml"] = generate_rss(size, podcast=True, ctbb=True, seed=size + 2)
+        fixtures[f"/atom/{size}.xml"] = generate_atom(size, seed=size + 3)
+        fixtures[f"/ctf/{size}.xml"] = generate_ctf_feed(size, seed=size + 4)
+    return fixtures
+# ------------------ Fixture Generation End ------------------
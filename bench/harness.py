@@ -0,0 +1,150 @@
+# Imports
+import asyncio
+import gc
+import json
+import math
+import time
+import tracemalloc
+
+from dataclasses import dataclass, asdict
+
+# ------------------ Measurement ------------------
+@dataclass
+class StageResult:
+    stage: str
+    size: int
+    runs: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    items_per_sec: float
+    peak_mib: float
+
+def percentile(samples, pct: float) -> float:
+    '''
+    Nearest-rank percentile of the given samples
+    '''
+
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+async def call(fn):
+    result = fn()
+    if asyncio.iscoroutine(result):
+        result = await result
+    return result
+
+async def measure(stage: str, size: int, fn, runs: int, setup=None, warmup: int = 1):
+    '''
+    Times a stage and records its peak memory
+
+    Timed runs happen without tracemalloc so it doesn't skew latency, peak
+    memory comes from one extra traced run.
+
+    Args:
+        stage (str): Name shown in the report
+        size (int): Items handled per run, used for throughput
+        fn (callable): Function or coroutine function doing one run
+        runs (int): Number of timed runs
+        setup (Optional [callable]): Function or coroutine function called untimed before every run
+        warmup (Optional [int]): Untimed runs before measuring
+
+    Returns:
+        StageResult: Latency percentiles, throughput and peak memory
+    '''
+
+    async def run_once():
+        if setup:
+            await call(setup)
+        start = time.perf_counter()
+        await call(fn)
+        return time.perf_counter() - start
+
+    for _ in range(warmup):
+        await run_once()
+
+    samples = []
+    gc.collect()
+    for _ in range(runs):
+        samples.append(await run_once())
+
+    if setup:
+        await call(setup)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        await call(fn)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    total = sum(samples)
+    return StageResult(
+        stage=stage,
+        size=size,
+        runs=runs,
+        p50_ms=percentile(samples, 50) * 1000,
+        p95_ms=percentile(samples, 95) * 1000,
+        p99_ms=percentile(samples, 99) * 1000,
+        items_per_sec=size * runs / total if total else float("inf"),
+        peak_mib=peak / (1024 * 1024),
+    )
+# ------------------ Measurement End ------------------
+
+# ------------------ Reporting ------------------
+LATENCY_NOISE_MS = 1.0
+PEAK_NOISE_MIB = 0.25
+HEADER = ("stage", "size", "runs", "p50 ms", "p95 ms", "p99 ms", "items/s", "peak MiB")
+
+def format_report(results) -> str:
+    '''
+    Renders results as a plain text table
+    '''
+
+    rows = [HEADER]
+    for r in results:
+        rows.append((
+            r.stage, str(r.size), str(r.runs), f"{r.p50_ms:.2f}", f"{r.p95_ms:.2f}", f"{r.p99_ms:.2f}",
+            f"{r.items_per_sec:,.0f}", f"{r.peak_mib:.2f}",
+        ))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(HEADER))]
+    lines = []
+    for n, row in enumerate(rows):
+        lines.append("  ".join(cell.ljust(w) if i == 0 else cell.rjust(w) for i, (cell, w) in enumerate(zip(row, widths))))
+        if n == 0:
+            lines.append("  ".join("-" * w for w in widths))
+    return "\n".join(lines)
+
+def save_results(results, path: str):
+    with open(path, "w") as f:
+        json.dump([asdict(r) for r in results], f, indent=2)
+
+def compare_results(results, baseline_path: str, threshold: float):
+    '''
+    Compares p50 latency and peak memory against a saved run
+
+    Args:
+        results (list): StageResult list of this run
+        baseline_path (str): JSON written by save_results
+        threshold (float): Allowed slowdown or growth, 0.2 means 20%
+
+    Returns:
+        list: Human readable regression lines, empty if nothing regressed
+    '''
+
+    with open(baseline_path) as f:
+        baseline = {(r["stage"], r["size"]): r for r in json.load(f)}
+
+    regressions = []
+    for r in results:
+        old = baseline.get((r.stage, r.size))
+        if old is None:
+            continue
+        if r.p50_ms > old["p50_ms"] * (1 + threshold) and r.p50_ms - old["p50_ms"] > LATENCY_NOISE_MS:
+            regressions.append(f"{r.stage} [{r.size}] p50 {old['p50_ms']:.2f} -> {r.p50_ms:.2f} ms")
+        # Tiny stages wobble between runs, so small absolute changes are never flagged
+        if r.peak_mib > old["peak_mib"] * (1 + threshold) and r.peak_mib - old["peak_mib"] > PEAK_NOISE_MIB:
+            regressions.append(f"{r.stage} [{r.size}] peak {old['peak_mib']:.2f} -> {r.peak_mib:.2f} MiB")
+    return regressions
+# ------------------ Reporting End ------------------
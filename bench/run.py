@@ -0,0 +1,176 @@
+# Imports
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import tempfile
+
+from dataclasses import replace
+from datetime import timezone
+
+# Run from the repo root as python -m bench.run, cogs is imported from there
+from cogs.DateUtils import parse_date
+from cogs.FeedStore import seed_feeds, ingest_entries, entry_fingerprint
+from cogs.FeedStream import parse_feed_since
+from cogs.FeedUtils import (
+    feed_cache, parse_feed, parse_ctf_feed, build_entry_embed, build_ctf_page_embed, build_feed_results, build_ctf_results,
+)
+from cogs.FetchUtils import close_session
+from cogs.Storage import Storage
+from cogs.SummaryText import summary_to_text
+from .fixtures import build_fixtures, show_notes
+from .harness import measure, format_report, save_results, compare_results
+from .server import FixtureServer
+
+import discord
+import feedparser
+
+# ------------------ Benchmark Stages ------------------
+DEFAULT_SIZES = (10, 1000, 10000)
+
+# Distinct show notes generated per size, stages cycle through them
+NOTES_POOL = 20
+
+def default_runs(size: int) -> int:
+    # Enough runs for stable percentiles on small feeds without taking minutes on large ones
+    return max(3, min(30, 20000 // size))
+
+def cold(url: str, variant):
+    # Drops the cached copy so the next parse fetches and parses the whole feed again
+    return lambda: feed_cache.invalidate((url, variant))
+
+class IngestStage:
+    '''
+    Inserts a parsed feed into a fresh DB per run, the same write check_feeds does
+    '''
+
+    def __init__(self, entries, directory: str):
+        self.entries = entries
+        self.path = os.path.join(directory, "bench.db")
+        self.storage = None
+
+    async def setup(self):
+        await self.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+        self.storage = Storage(self.path)
+        await self.storage.start()
+        await self.storage.write(seed_feeds, [("Bench", "bench://feed", None)])
+
+    async def run(self):
+        await self.storage.write(ingest_entries, [(1, self.entries)])
+
+    async def close(self):
+        if self.storage is not None:
+            await self.storage.close()
+            self.storage = None
+
+def render_all(entries):
+    # Rendering every page someone could flip to
+    total = len(entries)
+    for i, entry in enumerate(entries):
+        build_entry_embed(entry, discord.Color.orange(), "Listen", f"Result {i+1}/{total} — Bench")
+
+async def run_size(server: FixtureServer, size: int, runs: int, stages, workdir: str):
+    '''
+    Runs every selected stage against the fixtures of one size
+
+    Returns:
+        list: StageResult for each stage
+    '''
+
+    podcast = server.url(f"/podcast/{size}.xml")
+    atom = server.url(f"/atom/{size}.xml")
+    ctf = server.url(f"/ctf/{size}.xml")
+    rss_body = server.body(f"/rss/{size}.xml")
+    podcast_body = server.body(f"/podcast/{size}.xml")
+    ctbb_body = server.body(f"/ctbb/{size}.xml")
+
+    # Parsed once up front for the stages that start from entries
+    entries = build_feed_results(feedparser.parse(podcast_body), include_audio=True)
+    summaries = [e.summary for e in build_feed_results(feedparser.parse(rss_body))]
+    ctbb_summaries = [e.summary for e in build_feed_results(feedparser.parse(ctbb_body), include_audio=True)]
+    dates = [d.decode() for d in re.findall(rb"<pubDate>(.*?)</pubDate>", podcast_body)]
+    # Entries as the paginators read them back, with the summary text stored at ingest
+    stored = [replace(e, summary_text=summary_to_text(e.summary)) for e in entries]
+    pool = [show_notes(random.Random(size * NOTES_POOL + i)) for i in range(NOTES_POOL)]
+    notes = [pool[i % NOTES_POOL] for i in range(size)]
+    ctfs = build_ctf_results(feedparser.parse(server.body(f"/ctf/{size}.xml")))
+    newest = entries[min(2, len(entries) - 1)]
+    high_water = (newest.guid, int(newest.published.astimezone(timezone.utc).timestamp()))
+    ingest = IngestStage(entries, workdir)
+
+    plan = [
+        ("parse_feed cold", lambda: parse_feed(podcast, include_audio=True, fresh=True), cold(podcast, ("feed", True))),
+        ("parse_feed 304", lambda: parse_feed(podcast, include_audio=True, fresh=True), None),
+        ("parse_feed atom", lambda: parse_feed(atom, fresh=True), cold(atom, ("feed", False))),
+        ("parse_ctf_feed cold", lambda: parse_ctf_feed(ctf, fresh=True), cold(ctf, ("ctf",))),
+        ("stream full", lambda: parse_feed_since(podcast, include_audio=True), None),
+        ("stream incremental", lambda: parse_feed_since(podcast, high_water, include_audio=True), None),
+        ("parse_date", lambda: [parse_date(d) for d in dates], parse_date.cache_clear),
+        ("summary_to_text", lambda: [summary_to_text(s) for s in summaries], None),
+        ("summary_to_text ctbb", lambda: [summary_to_text(s, "ctbb") for s in ctbb_summaries], None),
+        ("summary_to_text notes", lambda: [summary_to_text(s) for s in notes], None),
+        ("summary_to_text notes full", lambda: [summary_to_text(s, max_length=None) for s in notes], None),
+        ("fingerprint", lambda: [entry_fingerprint(e.title, e.link, e.summary_text) for e in stored], None),
+        ("ingest", ingest.run, ingest.setup),
+        ("paginator render", lambda: render_all(stored), None),
+        ("ctf page render", lambda: build_ctf_page_embed(ctfs[:3], "Bench", discord.Color.fuchsia(), 0, -(-len(ctfs) // 3)), None),
+    ]
+
+    results = []
+    try:
+        for name, fn, setup in plan:
+            if stages and name not in stages:
+                continue
+            result = await measure(name, size, fn, runs, setup)
+            print(f"  {name} [{size}] p50 {result.p50_ms:.2f} ms", file=sys.stderr)
+            results.append(result)
+    finally:
+        await ingest.close()
+    return results
+# ------------------ Benchmark Stages End ------------------
+
+# ------------------ Entry Point ------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for feed parsing, ingest and embeds")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma separated item counts")
+    parser.add_argument("--runs", type=int, help="Timed runs per stage, scaled by size when omitted")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the fixture server waits before answering")
+    parser.add_argument("--stage", action="append", dest="stages", help="Only run this stage, can be repeated")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Compare against results saved with --json")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed regression against the baseline")
+    return parser.parse_args(argv)
+
+async def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    print("Generating fixtures...", file=sys.stderr)
+    results = []
+    with FixtureServer(build_fixtures(sizes), latency=args.latency) as server, tempfile.TemporaryDirectory() as workdir:
+        try:
+            for size in sizes:
+                results.extend(await run_size(server, size, args.runs or default_runs(size), args.stages, workdir))
+        finally:
+            await close_session()
+        print(f"Server handled {server.requests} requests, {server.not_modified} answered 304", file=sys.stderr)
+
+    print(format_report(results))
+    if args.json:
+        save_results(results, args.json)
+
+    if args.baseline:
+        regressions = compare_results(results, args.baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
+# ------------------ Entry Point End ------------------
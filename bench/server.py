@@ -0,0 +1,106 @@
+# Imports
+import hashlib
+import threading
+import time
+
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ------------------ Fixture Server ------------------
+class FixtureServer:
+    '''
+    Local HTTP stand-in for the real feed hosts
+
+    Serves generated feeds on 127.0.0.1 from a background thread, with an
+    optional delay before each response and ETag/Last-Modified validators
+    so conditional requests get a 304.
+    '''
+
+    def __init__(self, fixtures: dict, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+        self.not_modified = 0
+        self._fixtures = {}
+        modified = formatdate(usegmt=True)
+        for path, body in fixtures.items():
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            self._fixtures[path] = (body, etag, modified)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def url(self, path: str) -> str:
+        return self.base_url + path
+
+    def body(self, path: str) -> bytes:
+        return self._fixtures[path][0]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            # Headers and body go out in separate writes, without this delayed ACKs add ~40 ms per request
+            disable_nagle_algorithm = True
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    # The incremental parser hangs up once it has what it needs
+                    pass
+
+            def do_GET(self):
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+                fixture = server._fixtures.get(self.path)
+                if fixture is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body, etag, modified = fixture
+                if self.headers.get("If-None-Match") == etag or self.headers.get("If-Modified-Since") == modified:
+                    server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/rss+xml")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", modified)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+# ------------------ Fixture Server End ------------------
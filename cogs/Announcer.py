@@ -0,0 +1,192 @@
+# Imports
+import asyncio
+import time
+import discord
+
+from .FeedStore import pending_announcements, mark_posted
+from .Metrics import metrics
+from .Storage import db
+
+# ------------------ Token Bucket ------------------
+class TokenBucket:
+    '''
+    Paces sends to a steady rate while still allowing short bursts
+
+    Several tasks may share a bucket (ThreadSync's workers do). There's no lock
+    because acquire has no await between finding a token and taking it, so a
+    waiter that wakes to a token another task took just sleeps again.
+    '''
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        '''
+        Waits until a token is available and takes it
+        '''
+
+        self._refill()
+        while self._tokens < 1:
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+            self._refill()
+        self._tokens -= 1
+
+    def empty(self):
+        '''
+        Drops every banked token, used after Discord pushes back
+        '''
+
+        self._tokens = 0
+        self._updated = time.monotonic()
+# ------------------ Token Bucket End ------------------
+
+# ------------------ Announcer ------------------
+# Discord allows about 5 messages per 5 seconds per channel, stay just under it
+SEND_RATE = 0.8
+SEND_BURST = 4
+
+# A burst of new entries is grouped into one embed of up to this many lines
+GROUP_SIZE = 20
+EMBED_DESCRIPTION_LIMIT = 4096
+
+# Backoff after a failed send, doubling up to the cap
+BACKOFF_BASE = 5
+BACKOFF_MAX = 15 * 60
+
+def announcement_line(name: str, title: str, link: str) -> str:
+    title = discord.utils.escape_markdown(title or "No title").replace("]", "\\]")
+    return f"**{name}** just released: [{title}]({link})" if link else f"**{name}** just released: {title}"
+
+class Announcer:
+    '''
+    Posts ingested entries to the news channel
+
+    Works off the posted = 0 rows of entries rather than an in-memory list,
+    so anything left over from a failure or restart is sent on the next
+    drain. Sends go through a token bucket. When several entries are waiting
+    they're grouped into one embed, and failures back off exponentially.
+    '''
+
+    def __init__(self, bot, channel_id):
+        self.bot = bot
+        self.channel_id = int(channel_id)
+        self.bucket = TokenBucket(SEND_RATE, SEND_BURST)
+        self._wake = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    def wake(self):
+        '''
+        Asks the dispatcher to drain, called after new entries are ingested
+        '''
+
+        self._wake.set()
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        failures = 0
+        while not self.bot.is_closed():
+            # Cleared before draining so entries ingested mid-drain still trigger another pass
+            self._wake.clear()
+            try:
+                await self.drain()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (failures - 1))
+                print(f"[Announcer] send failed ({e}), retrying in {delay}s")
+                await asyncio.sleep(delay)
+                continue
+            await self._wake.wait()
+
+    async def get_channel(self):
+        channel = self.bot.get_channel(self.channel_id)
+        if channel is None:
+            channel = await self.bot.fetch_channel(self.channel_id)
+        return channel
+
+    async def drain(self):
+        '''
+        Sends every unposted entry, oldest first, marking each message's entries as posted once it lands
+        '''
+
+        channel = await self.get_channel()
+        solo = 0  # Entries of a rejected grouped message still to send one by one
+        while True:
+            rows = await db.read(pending_announcements, 1 if solo else GROUP_SIZE)
+            if not rows:
+                return
+
+            batch, kwargs = self.build_message(rows)
+            with metrics.timer("announce_wait"):
+                await self.bucket.acquire()
+            try:
+                with metrics.timer("discord_send"):
+                    await channel.send(**kwargs)
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    metrics.incr("discord_rate_limited")
+                    self.bucket.empty()
+                    raise
+                if e.status != 400:
+                    raise
+
+                # Discord rejected the message itself, retrying won't help. Only its own
+                # entries are sent one by one, the rest are grouped again
+                if len(batch) > 1:
+                    print(f"[Announcer] grouped message rejected ({e}), sending its {len(batch)} entries one by one")
+                    solo = len(batch)
+                    continue
+                print(f"[Announcer] skipping guid {batch[0]}: {e}")
+            else:
+                metrics.incr("announced", len(batch))
+            await db.write(mark_posted, batch)
+            solo = max(0, solo - len(batch))
+
+    def build_message(self, rows):
+        '''
+        Builds one message out of the oldest pending entries
+
+        Args:
+            rows (list): (guid, feed name, title, link) rows, oldest first
+
+        Returns:
+            tuple: The guids covered by the message and the kwargs for channel.send
+        '''
+
+        if len(rows) == 1:
+            guid, name, title, link = rows[0]
+            return [guid], {"content": f"**{name}** just released: {title} {link}"}
+
+        guids = []
+        lines = []
+        length = 0
+        for guid, name, title, link in rows:
+            line = announcement_line(name, title, link)
+            if lines and length + len(line) + 1 > EMBED_DESCRIPTION_LIMIT:
+                break
+            guids.append(guid)
+            lines.append(line[:EMBED_DESCRIPTION_LIMIT])
+            length += len(line) + 1
+
+        embed = discord.Embed(
+            title=f"{len(lines)} new releases" if len(lines) > 1 else "New release",
+            description="\n".join(lines),
+            color=discord.Color.dark_teal(),
+        )
+        return guids, {"embed": embed}
+# ------------------ Announcer End ------------------
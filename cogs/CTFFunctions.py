@@ -1,43 +1,106 @@
 # Imports
-import os
+import asyncio
 import discord
-import sqlite3
 
 from discord.ext import commands
 from discord import app_commands
 from datetime import datetime, timedelta, timezone
 
 # Token
-from BotOfSin import GUILD_ID
-from .FeedUtils import parse_ctf_feed, make_ctf_paginated_view
-
-# ------------------ Queue DB Setup ------------------
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, "ctfs.db")
-
-conn = sqlite3.connect(DB_PATH)
-cursor = conn.cursor()
-cursor.execute(
-    "CREATE TABLE IF NOT EXISTS queue (ctf_name TEXT PRIMARY KEY, start_time INTEGER, link TEXT)"
-)
-conn.commit()
-# ------------------ DB Setup End ------------------
+from BotOfSin import CONFIG, GUILD_ID, CHANNEL_ID
+from .FeedUtils import parse_ctf_feed
+from .CTFStore import upsert_ctf_events, find_upcoming_ctf, get_ctf_event, upcoming_titles, forget_ctf_thread
+from .Paginators import open_pager
+from .Reminders import ReminderScheduler
+from .CTFThreads import ThreadSync
+from .TitleIndex import TitleIndex
+from .Metrics import metrics
+from .Storage import db
 
 # ------------------ Feed Sources ------------------
 UPCOMING_FEED = "https://ctftime.org/event/list/upcoming/rss/"
 PAST_FEED = "https://ctftime.org/event/list/archive/rss/"
 
-def fetch_upcoming_ctfs():
-    return parse_ctf_feed(UPCOMING_FEED)
+# fresh skips the stale-while-revalidate copy, it's always older than the refresh interval
+async def fetch_upcoming_ctfs():
+    return await parse_ctf_feed(UPCOMING_FEED, fresh=True)
+
+async def fetch_past_ctfs():
+    return await parse_ctf_feed(PAST_FEED, fresh=True)
 
-def fetch_past_ctfs():
-    return parse_ctf_feed(PAST_FEED)
+# How often ctf_events is refreshed from CTFtime
+CTF_REFRESH_INTERVAL = 30 * 60
 # ------------------ Feed Sources End ------------------
 
 # ------------------ CTF Commands Cog ------------------
 class CTFCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self._refresh_task = None
+
+        # Autocomplete indexes, upcoming events by link and queued CTFs by name
+        self.event_index = TitleIndex()
+        self.queue_index = TitleIndex()
+
+        # Reminders go to the news channel unless REMINDER_CHANNEL_ID says otherwise
+        self.reminders = ReminderScheduler(bot, CONFIG.get("REMINDER_CHANNEL_ID", CHANNEL_ID))
+        # One /ctfthreads run at a time, so two runs can't both create a missing thread
+        self._thread_lock = asyncio.Lock()
+
+    async def cog_load(self):
+        await db.start()
+        await self.sync_event_index()
+        rows = await db.fetchall("SELECT ctf_name, start_time FROM queue")
+        self.queue_index.sync([(name, name, ts or 0) for name, ts in rows])
+        await self.reminders.load()
+        self.reminders.start()
+        self._refresh_task = asyncio.create_task(self.refresh_loop())
+
+    async def cog_unload(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+        self.reminders.stop()
+
+    # ------------------ CTF Event Refresh ------------------
+    async def refresh_loop(self):
+        while True:
+            try:
+                await self.refresh_events()
+            except Exception as e:
+                print(f"[refresh_loop] unexpected error: {e}")
+            await asyncio.sleep(CTF_REFRESH_INTERVAL)
+
+    async def refresh_events(self):
+        '''
+        Pulls the upcoming and past CTFtime feeds into ctf_events, keeping old data if CTFtime is down
+        '''
+        
+        for name, fetch in (("upcoming", fetch_upcoming_ctfs), ("past", fetch_past_ctfs)):
+            try:
+                with metrics.timer("ctftime_refresh", feed=name):
+                    ctfs = await fetch()
+                    await db.write(upsert_ctf_events, ctfs)
+            except Exception as e:
+                print(f"[refresh_events] {name} refresh failed: {e}")
+        await self.sync_event_index()
+
+    async def sync_event_index(self):
+        rows = await db.read(upcoming_titles, datetime.now(timezone.utc))
+        self.event_index.sync(rows)
+
+    async def send_window(self, interaction: discord.Interaction, start, end, title: str, empty: str):
+        params = {
+            "start": int(start.timestamp()),
+            "end": int(end.timestamp()),
+            "title": title,
+            "color": discord.Color.fuchsia().value,
+        }
+        embed, view = await open_pager("ctf", params)
+        if embed is None:
+            await interaction.response.send_message(empty)
+            return
+        await interaction.response.send_message(embed=embed, view=view)
+    # ------------------ CTF Event Refresh End ------------------
 
     # /ping - sanity check
     @app_commands.command(name="ping", description="Sanity check")
@@ -48,64 +111,72 @@ class CTFCommands(commands.Cog):
     @app_commands.command(name="week", description="Show CTFs in the next 7 days")
     async def week(self, interaction: discord.Interaction):
         now = datetime.now(timezone.utc)
-        end = now + timedelta(days=7)
-        ctfs = [c for c in fetch_upcoming_ctfs() if c["start_date"] and now <= c["start_date"] <= end]
-
-        if not ctfs:
-            await interaction.response.send_message("No CTFs in next 7 days.")
-            return
-
-        embed, view = make_ctf_paginated_view(ctfs, "CTFs in Next 7 Days", discord.Color.fuchsia())
-        await interaction.response.send_message(embed=embed, view=view)
+        await self.send_window(interaction, now, now + timedelta(days=7), "CTFs in Next 7 Days", "No CTFs in next 7 days.")
 
     # /month - shows CTFs happening in the current month
     @app_commands.command(name="month", description="Show CTFs this month")
     async def month(self, interaction: discord.Interaction):
+        start = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        end = (start + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
+        await self.send_window(interaction, start, end, "CTFs This Month", "No CTFs this month.")
+
+    # /ctfs - shows CTFs in any window of days ahead or behind
+    @app_commands.command(name="ctfs", description="Show CTFs within a number of days from now")
+    @app_commands.describe(days="How many days to cover", past="Look back instead of ahead")
+    async def ctfs(self, interaction: discord.Interaction, days: app_commands.Range[int, 1, 365] = 30, past: bool = False):
         now = datetime.now(timezone.utc)
-        ctfs = [
-            c for c in fetch_upcoming_ctfs()
-            if c["start_date"] and c["start_date"].month == now.month and c["start_date"].year == now.year
-        ]
-
-        if not ctfs:
-            await interaction.response.send_message("No CTFs this month.")
-            return
-
-        embed, view = make_ctf_paginated_view(ctfs, "CTFs This Month", discord.Color.fuchsia())
-        await interaction.response.send_message(embed=embed, view=view)
+        if past:
+            await self.send_window(interaction, now - timedelta(days=days), now, f"CTFs in Last {days} Days", f"No CTFs in the last {days} days.")
+        else:
+            await self.send_window(interaction, now, now + timedelta(days=days), f"CTFs in Next {days} Days", f"No CTFs in the next {days} days.")
 
     # /addctf - searching for the given CTF, grabbing the name, start date, and calculating the time till it starts
     @app_commands.command(name="addctf", description="Add a CTF to the signup queue")
     async def addctf(self, interaction: discord.Interaction, ctf_name: str):
-        ctfs = fetch_upcoming_ctfs()
-        match = next((c for c in ctfs if ctf_name.lower() in c["title"].lower()), None)
+        # Autocomplete hands back the exact event link, typed text falls back to a title match
+        match = None
+        if ctf_name in self.event_index:
+            match = await db.read(get_ctf_event, ctf_name)
+        if not match:
+            match = await db.read(find_upcoming_ctf, ctf_name, datetime.now(timezone.utc))
 
         if not match:
             await interaction.response.send_message(f"No upcoming CTF found for: {ctf_name}")
             return
 
-        if not match["start_date"]:
-            await interaction.response.send_message(f"{match['title']} has no known start date.")
+        if not match.start_date:
+            await interaction.response.send_message(f"{match.title} has no known start date.")
             return
 
-        ts = int(match["start_date"].timestamp())
+        ts = int(match.start_date.timestamp())
         try:
-            cursor.execute(
+            await db.execute(
                 "REPLACE INTO queue (ctf_name, start_time, link) VALUES (?, ?, ?)",
-                (match["title"], ts, match["link"]),
+                (match.title, ts, match.link),
             )
-            conn.commit()
+            self.queue_index.add(match.title, match.title, ts)
+            self.reminders.track(match.title, ts, match.link)
             await interaction.response.send_message(
-                f"Added **{match['title']}** to queue! Starts <t:{ts}:R> (<t:{ts}:F>)"
+                f"Added **{match.title}** to queue! Starts <t:{ts}:R> (<t:{ts}:F>)"
             )
         except Exception as e:
             await interaction.response.send_message(f"Error adding to queue: {e}")
 
+    @addctf.autocomplete("ctf_name")
+    async def addctf_autocomplete(self, interaction: discord.Interaction, current: str):
+        # Autocomplete never reaches on_app_command_completion, so it's timed here
+        with metrics.timer("autocomplete", command="addctf"):
+            choices = []
+            for link in self.event_index.search(current):
+                title, ts = self.event_index.get(link)
+                date = datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+                choices.append(app_commands.Choice(name=f"{title[:85]} ({date})", value=link))
+        return choices
+
     # /queue - dumps the entire queue DB 
     @app_commands.command(name="queue", description="Show queued CTFs")
     async def queue(self, interaction: discord.Interaction):
-        cursor.execute("SELECT ctf_name, start_time, link FROM queue ORDER BY start_time ASC")
-        rows = cursor.fetchall()
+        rows = await db.fetchall("SELECT ctf_name, start_time, link FROM queue ORDER BY start_time ASC")
 
         if not rows:
             await interaction.response.send_message("The queue is empty.")
@@ -119,16 +190,58 @@ class CTFCommands(commands.Cog):
     # /dequeue - removes a given CTF from the DB
     @app_commands.command(name="dequeue", description="Remove a CTF from the signup queue")
     async def dequeue(self, interaction: discord.Interaction, ctf_name: str):
-        cursor.execute("SELECT ctf_name FROM queue WHERE LOWER(ctf_name) LIKE ?", (f"%{ctf_name.lower()}%",))
-        row = cursor.fetchone()
+        if ctf_name in self.queue_index:
+            row = (ctf_name,)
+        else:
+            row = await db.fetchone("SELECT ctf_name FROM queue WHERE LOWER(ctf_name) LIKE ?", (f"%{ctf_name.lower()}%",))
 
         if not row:
             await interaction.response.send_message(f"No CTF in queue matching: {ctf_name}")
             return
 
-        cursor.execute("DELETE FROM queue WHERE ctf_name = ?", (row[0],))
-        conn.commit()
+        await db.execute("DELETE FROM queue WHERE ctf_name = ?", (row[0],))
+        self.queue_index.remove(row[0])
+        self.reminders.untrack(row[0])
         await interaction.response.send_message(f"Removed **{row[0]}** from the queue.")
+
+    @dequeue.autocomplete("ctf_name")
+    async def dequeue_autocomplete(self, interaction: discord.Interaction, current: str):
+        with metrics.timer("autocomplete", command="dequeue"):
+            return [
+                app_commands.Choice(name=name[:100], value=name)
+                for name in self.queue_index.search(current)
+                if len(name) <= 100
+            ]
+
+    # /ctfthreads - makes a forum thread for every queued CTF, updating the ones already made
+    @app_commands.command(name="ctfthreads", description="Create or update a forum thread for every queued CTF")
+    @app_commands.default_permissions(manage_threads=True)
+    async def ctfthreads(self, interaction: discord.Interaction):
+        forum_id = CONFIG.get("FORUM_CHANNEL_ID")
+        if not forum_id:
+            await interaction.response.send_message("Set FORUM_CHANNEL_ID in config.json first.", ephemeral=True)
+            return
+        if self._thread_lock.locked():
+            await interaction.response.send_message("Threads are already being synced.", ephemeral=True)
+            return
+
+        await interaction.response.defer()
+        async with self._thread_lock:
+            forum = self.bot.get_channel(int(forum_id)) or await self.bot.fetch_channel(int(forum_id))
+            if not isinstance(forum, discord.ForumChannel):
+                await interaction.followup.send(f"Channel {forum_id} isn't a forum channel.")
+                return
+            counts = await ThreadSync(self.bot, forum).run()
+
+        await interaction.followup.send(
+            f"Threads in {forum.mention}: {counts['created']} created, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged, {counts['failed']} failed."
+        )
+
+    # A deleted thread is forgotten, so the next /ctfthreads makes it again
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent):
+        await db.write(forget_ctf_thread, payload.thread_id)
 # ------------------ CTF Commands Cog End ------------------
 
 # Discord Setup
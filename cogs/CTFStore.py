@@ -0,0 +1,203 @@
+# Imports
+import sqlite3
+import time
+
+from datetime import datetime, timezone
+from .Models import CTFEntry
+
+# ------------------ CTF Event Store ------------------
+def upsert_ctf_events(conn: sqlite3.Connection, ctfs):
+    '''
+    Inserts or refreshes CTFtime events, keyed by their CTFtime link
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        ctfs (list): Entries returned by parse_ctf_feed
+
+    Returns:
+        int: Number of events written
+    '''
+
+    now = int(time.time())
+    rows = [
+        (
+            c.link,
+            c.title or "Unknown",
+            c.summary,
+            int(c.start_date.timestamp()) if c.start_date else None,
+            c.weight,
+            c.format,
+            c.official_url,
+            now,
+        )
+        for c in ctfs if c.link
+    ]
+
+    conn.executemany(
+        """INSERT INTO ctf_events (link, title, summary, start_time, weight, format, official_url, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (link) DO UPDATE SET
+            title = excluded.title,
+            summary = excluded.summary,
+            start_time = excluded.start_time,
+            weight = excluded.weight,
+            format = excluded.format,
+            official_url = COALESCE(excluded.official_url, ctf_events.official_url),
+            updated_at = excluded.updated_at""",
+        rows,
+    )
+    return len(rows)
+
+# Columns read back into a CTFEntry, in row_to_ctf order
+CTF_COLUMNS = "title, link, summary, start_time, weight, format, official_url"
+
+def row_to_ctf(row):
+    '''
+    Converts a ctf_events row to the entry shown by the CTF pager
+
+    Args:
+        row (tuple): Row selected with CTF_COLUMNS
+
+    Returns:
+        CTFEntry: The event
+    '''
+
+    title, link, summary, start_time, weight, format_, official_url = row
+    return CTFEntry(
+        title=title,
+        link=link,
+        summary=summary or "",
+        start_date=datetime.fromtimestamp(start_time, timezone.utc) if start_time is not None else None,
+        weight=weight or "Unknown",
+        format=format_ or "Unknown",
+        official_url=official_url,
+    )
+
+def ctf_events_between(conn: sqlite3.Connection, start: datetime, end: datetime, offset: int = 0, limit: int = -1):
+    '''
+    Range query over the indexed start times
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        start (datetime): Inclusive lower bound
+        end (datetime): Inclusive upper bound
+        offset (Optional [int]): Events to skip, for paging
+        limit (Optional [int]): Maximum number of events, -1 for all
+
+    Returns:
+        list: Events starting within the window, soonest first
+    '''
+
+    rows = conn.execute(
+        f"""SELECT {CTF_COLUMNS} FROM ctf_events
+        WHERE start_time BETWEEN ? AND ?
+        ORDER BY start_time ASC, link ASC
+        LIMIT ? OFFSET ?""",
+        (int(start.timestamp()), int(end.timestamp()), limit, offset),
+    )
+    return [row_to_ctf(row) for row in rows]
+
+def count_ctf_events_between(conn: sqlite3.Connection, start: datetime, end: datetime) -> int:
+    return conn.execute(
+        "SELECT COUNT(*) FROM ctf_events WHERE start_time BETWEEN ? AND ?",
+        (int(start.timestamp()), int(end.timestamp())),
+    ).fetchone()[0]
+
+def find_upcoming_ctf(conn: sqlite3.Connection, name: str, now: datetime):
+    '''
+    Finds the soonest upcoming event whose title contains the given name
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        name (str): Part of the CTF title
+        now (datetime): Events starting before this are ignored
+
+    Returns:
+        CTFEntry: The matching event, or None
+    '''
+
+    row = conn.execute(
+        f"""SELECT {CTF_COLUMNS} FROM ctf_events
+        WHERE start_time >= ? AND INSTR(LOWER(title), ?) > 0
+        ORDER BY start_time ASC LIMIT 1""",
+        (int(now.timestamp()), name.lower()),
+    ).fetchone()
+    return row_to_ctf(row) if row else None
+
+def get_ctf_event(conn: sqlite3.Connection, link: str):
+    '''
+    Looks up a single event by its CTFtime link
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        link (str): CTFtime link of the event
+
+    Returns:
+        CTFEntry: The event, or None
+    '''
+
+    row = conn.execute(
+        f"SELECT {CTF_COLUMNS} FROM ctf_events WHERE link = ?", (link,)
+    ).fetchone()
+    return row_to_ctf(row) if row else None
+
+def upcoming_titles(conn: sqlite3.Connection, now: datetime):
+    '''
+    Lists the events that haven't started yet, for the autocomplete index
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        now (datetime): Events starting before this are left out
+
+    Returns:
+        list: (link, title, start_time) tuples
+    '''
+
+    return conn.execute(
+        "SELECT link, title, start_time FROM ctf_events WHERE start_time >= ?", (int(now.timestamp()),)
+    ).fetchall()
+# ------------------ CTF Event Store End ------------------
+
+# ------------------ CTF Thread Store ------------------
+def queued_ctfs(conn: sqlite3.Connection):
+    '''
+    Lists the queued CTFs with whatever CTFtime details ctf_events holds for them
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+
+    Returns:
+        list: A CTFEntry per queue row, titled by its queue name, soonest first
+    '''
+
+    rows = conn.execute(
+        """SELECT q.ctf_name, q.link, e.summary, COALESCE(e.start_time, q.start_time), e.weight, e.format, e.official_url
+        FROM queue q LEFT JOIN ctf_events e ON e.link = q.link
+        ORDER BY q.start_time ASC, q.ctf_name ASC"""
+    )
+    return [row_to_ctf(row) for row in rows]
+
+def ctf_threads(conn: sqlite3.Connection) -> dict:
+    '''
+    Returns:
+        dict: ctf_name -> (thread_id, digest) of every forum thread made so far
+    '''
+
+    return {
+        name: (thread_id, digest)
+        for name, thread_id, digest in conn.execute("SELECT ctf_name, thread_id, digest FROM ctf_threads")
+    }
+
+def save_ctf_thread(conn: sqlite3.Connection, name: str, thread_id: int, digest: str):
+    conn.execute(
+        """INSERT INTO ctf_threads (ctf_name, thread_id, digest, updated_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT (ctf_name) DO UPDATE SET
+            thread_id = excluded.thread_id,
+            digest = excluded.digest,
+            updated_at = excluded.updated_at""",
+        (name, thread_id, digest, int(time.time())),
+    )
+
+def forget_ctf_thread(conn: sqlite3.Connection, thread_id: int) -> int:
+    return conn.execute("DELETE FROM ctf_threads WHERE thread_id = ?", (thread_id,)).rowcount
+# ------------------ CTF Thread Store End ------------------
@@ -0,0 +1,128 @@
+# Imports
+import asyncio
+import hashlib
+import json
+import discord
+
+from .Announcer import TokenBucket
+from .CTFStore import queued_ctfs, ctf_threads, save_ctf_thread
+from .FeedUtils import ctf_details
+from .Metrics import metrics
+from .Storage import db
+
+# ------------------ CTF Threads ------------------
+# Thread creation and edits count against the same per-channel limits as messages
+THREAD_RATE = 0.8
+THREAD_BURST = 4
+# Requests in flight at once, the bucket decides how fast they start
+THREAD_WORKERS = 4
+THREAD_NAME_LIMIT = 100
+
+def thread_post(entry):
+    '''
+    Builds the forum thread of a queued CTF
+
+    Args:
+        entry (CTFEntry): The queued CTF
+
+    Returns:
+        tuple: (thread name, embed, digest), the digest changes whenever the name or embed does
+    '''
+
+    name = entry.title[:THREAD_NAME_LIMIT]
+    embed = discord.Embed(
+        title=entry.title, url=entry.link or None, description=ctf_details(entry), color=discord.Color.fuchsia()
+    )
+    payload = json.dumps([name, embed.to_dict()], sort_keys=True)
+    return name, embed, hashlib.sha256(payload.encode()).hexdigest()
+
+class ThreadSync:
+    '''
+    Creates or updates one forum thread per queued CTF
+
+    Thread ids and a digest of each post are kept in ctf_threads, so a re-run
+    only creates the threads that are missing and edits the ones whose
+    CTFtime details changed. A few requests run at once, each starting
+    through a token bucket to stay under Discord's rate limits.
+    '''
+
+    def __init__(self, bot, forum: discord.ForumChannel):
+        self.bot = bot
+        self.forum = forum
+        self.bucket = TokenBucket(THREAD_RATE, THREAD_BURST)
+        self.counts = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0}
+
+    async def run(self) -> dict:
+        '''
+        Brings the forum in line with the queue
+
+        Returns:
+            dict: How many threads were created, updated, left unchanged or failed
+        '''
+
+        entries = await db.read(queued_ctfs)
+        known = await db.read(ctf_threads)
+        workers = asyncio.Semaphore(THREAD_WORKERS)
+
+        async def sync(entry):
+            async with workers:
+                await self.sync_one(entry, known.get(entry.title))
+
+        await asyncio.gather(*(sync(entry) for entry in entries))
+        return self.counts
+
+    async def sync_one(self, entry, known):
+        name, embed, digest = thread_post(entry)
+        if known and known[1] == digest:
+            self.counts["unchanged"] += 1
+            return
+
+        try:
+            if known and await self.update(known[0], name, embed):
+                thread_id, result = known[0], "updated"
+            else:
+                thread_id, result = await self.create(name, embed), "created"
+        except discord.HTTPException as e:
+            if e.status == 429:
+                metrics.incr("discord_rate_limited")
+                self.bucket.empty()
+            print(f"[ThreadSync] {entry.title} failed: {e}")
+            self.counts["failed"] += 1
+            return
+
+        # Saved as each thread lands, so a failed or interrupted run never makes it twice
+        await db.write(save_ctf_thread, entry.title, thread_id, digest)
+        self.counts[result] += 1
+        metrics.incr("ctf_threads", result=result)
+
+    async def create(self, name: str, embed: discord.Embed) -> int:
+        await self.bucket.acquire()
+        with metrics.timer("discord_send"):
+            created = await self.forum.create_thread(name=name, embed=embed)
+        return created.thread.id
+
+    async def update(self, thread_id: int, name: str, embed: discord.Embed) -> bool:
+        '''
+        Edits an existing thread's name and starter post
+
+        Returns:
+            bool: False when the thread was deleted and has to be made again
+        '''
+
+        try:
+            thread = self.forum.get_thread(thread_id)
+            if thread is None:
+                await self.bucket.acquire()
+                thread = await self.bot.fetch_channel(thread_id)
+            # Archived threads can't be posted in, renaming and unarchiving is one request
+            if thread.name != name or thread.archived:
+                await self.bucket.acquire()
+                await thread.edit(name=name, archived=False)
+            await self.bucket.acquire()
+            # A forum thread's starter message shares the thread's id
+            with metrics.timer("discord_send"):
+                await thread.get_partial_message(thread_id).edit(embed=embed)
+        except discord.NotFound:
+            return False
+        return True
+# ------------------ CTF Threads End ------------------
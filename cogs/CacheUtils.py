@@ -0,0 +1,104 @@
+# Imports
+import asyncio
+import time
+
+from collections import OrderedDict
+from .Metrics import metrics
+
+# ------------------ TTL Cache ------------------
+class TTLCache:
+    '''
+    Bounded in-process cache for async loaders
+
+    Fresh values are served directly. Stale values are served while a single
+    background refresh runs, and concurrent misses share one in-flight load.
+    Loaders are called with the previous value (or None) so they can revalidate it.
+    '''
+
+    def __init__(self, ttl: float = 300, maxsize: int = 32):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (value, loaded_at)
+        self._inflight = {}            # key -> asyncio.Task
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get(self, key, loader, ttl: float = None):
+        '''
+        Returns the cached value for key, loading or revalidating it as needed
+
+        Args:
+            key: Cache key
+            loader (callable): Coroutine function taking the previous value and returning the new one
+            ttl (Optional [float]): Overrides the cache TTL for this lookup
+
+        Returns:
+            The cached or freshly loaded value
+        '''
+
+        ttl = self.ttl if ttl is None else ttl
+        entry = self._entries.get(key)
+        if entry is None:
+            metrics.incr("cache", result="miss")
+            return await self._load(key, loader)
+
+        value, loaded_at = entry
+        self._entries.move_to_end(key)
+        if time.monotonic() - loaded_at > ttl:
+            metrics.incr("cache", result="stale")
+            if key not in self._inflight:
+                # Stale-while-revalidate, callers keep the old value until this lands
+                self._start(key, loader, value)
+        else:
+            metrics.incr("cache", result="hit")
+        return value
+
+    async def refresh(self, key, loader):
+        '''
+        Forces a fresh load of key, sharing any load already in flight
+
+        Args:
+            key: Cache key
+            loader (callable): Coroutine function taking the previous value and returning the new one
+
+        Returns:
+            The freshly loaded value
+        '''
+
+        return await self._load(key, loader)
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+
+    async def _load(self, key, loader):
+        task = self._inflight.get(key)
+        if task is None:
+            entry = self._entries.get(key)
+            task = self._start(key, loader, entry[0] if entry else None)
+        # Shield so one cancelled caller doesn't cancel the load for everyone else
+        return await asyncio.shield(task)
+
+    def _start(self, key, loader, previous):
+        task = asyncio.create_task(self._run(key, loader, previous))
+        # Background refreshes have no caller, and a shielded load's callers may all be cancelled
+        task.add_done_callback(self._log_load_error)
+        self._inflight[key] = task
+        return task
+
+    async def _run(self, key, loader, previous):
+        try:
+            value = await loader(previous)
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    @staticmethod
+    def _log_load_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[TTLCache] load failed: {task.exception()}")
+# ------------------ TTL Cache End ------------------
@@ -0,0 +1,114 @@
+# Imports
+import re
+
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from .Metrics import metrics
+
+# ------------------ Date Parsing ------------------
+# Feeds repeat the same few dates (updated stamps, CTF start times), keep the recent ones parsed
+DATE_CACHE_SIZE = 4096
+
+MONTHS = {name: i for i, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1
+)}
+
+# Named zones RFC 822 allows, as hours from UTC
+ZONES = {
+    "ut": 0, "utc": 0, "gmt": 0, "z": 0,
+    "est": -5, "edt": -4, "cst": -6, "cdt": -5, "mst": -7, "mdt": -6, "pst": -8, "pdt": -7,
+}
+
+# e.g. "Tue, 07 Jan 2025 12:00:00 +0000" or "7 Jan 25 12:00 GMT"
+RFC822_PATTERN = re.compile(
+    r"(?:[a-z]+,?\s*)?(\d{1,2})\s+([a-z]{3})[a-z]*\.?\s+(\d{2}|\d{4})\s+"
+    r"(\d{1,2}):(\d{2})(?::(\d{2}))?(?:\s*([+-]\d{4}|[a-z]{1,3}))?",
+    re.IGNORECASE,
+)
+
+# e.g. "2025-01-07T12:00:00.123+00:00", "2025-01-07 12:00Z" or CTFtime's "20250107T120000"
+ISO8601_PATTERN = re.compile(
+    r"(\d{4})-?(\d{2})-?(\d{2})(?:[T ](\d{2}):?(\d{2})(?::?(\d{2})(?:[.,](\d+))?)?)?"
+    r"\s*(Z|[+-]\d{2}(?::?\d{2})?)?",
+    re.IGNORECASE,
+)
+
+@lru_cache(maxsize=64)
+def utc_offset(zone: str):
+    # None means the zone isn't one we know, so the fast path gives up
+    if not zone:
+        return timezone.utc
+    if zone[0] in "+-":
+        if zone.strip("+-0:") == "":
+            return timezone.utc
+        digits = zone[1:].replace(":", "")
+        minutes = int(digits[:2]) * 60 + (int(digits[2:4]) if len(digits) > 2 else 0)
+        return timezone(timedelta(minutes=-minutes if zone[0] == "-" else minutes))
+    hours = ZONES.get(zone.lower())
+    return None if hours is None else timezone(timedelta(hours=hours))
+
+def parse_rfc822(value: str):
+    match = RFC822_PATTERN.fullmatch(value)
+    if not match:
+        return None
+    day, month, year, hour, minute, second, zone = match.groups()
+    month = MONTHS.get(month.lower())
+    tz = utc_offset(zone)
+    if month is None or tz is None:
+        return None
+    year = int(year)
+    if year < 100:
+        year += 2000 if year < 50 else 1900
+    return datetime(year, month, int(day), int(hour), int(minute), int(second or 0), tzinfo=tz)
+
+def parse_iso8601(value: str):
+    match = ISO8601_PATTERN.fullmatch(value)
+    if not match:
+        return None
+    year, month, day, hour, minute, second, fraction, zone = match.groups()
+    tz = utc_offset(zone)
+    if tz is None:
+        return None
+    micro = int((fraction or "0")[:6].ljust(6, "0"))
+    return datetime(
+        int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0), micro, tzinfo=tz
+    )
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(value: str):
+    '''
+    Parses a feed date into an aware UTC datetime
+
+    RFC 822 (RSS) and ISO 8601 (Atom, CTFtime) dates are parsed directly,
+    anything else falls back to dateutil. Dates without a zone are taken as UTC.
+
+    Args:
+        value (str): Date as written in the feed
+
+    Returns:
+        datetime: The date in UTC, or None if it can't be parsed
+    '''
+
+    if not value:
+        return None
+    text = value.strip()
+    try:
+        # ISO dates lead with the year, RFC 822 ones with the weekday or a one or two digit day
+        parsed = parse_iso8601(text) if text[:4].isdigit() else parse_rfc822(text)
+    except ValueError:
+        # Matched the shape but not a real date (e.g. 31 Feb), let dateutil have a go
+        parsed = None
+    if parsed is not None:
+        return parsed if parsed.tzinfo is timezone.utc else parsed.astimezone(timezone.utc)
+
+    metrics.incr("date_parse", result="fallback")
+    from dateutil import parser as dateparser
+    try:
+        parsed = dateparser.parse(text)
+    except Exception:
+        metrics.incr("date_parse", result="failed")
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+# ------------------ Date Parsing End ------------------
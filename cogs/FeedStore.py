@@ -0,0 +1,630 @@
+# Imports
+import json
+import re
+import sqlite3
+import time
+
+from datetime import datetime, timezone
+from .Fingerprint import (
+    canonical_link, simhash, simhash_bands, hamming_distance, story_text, similar_titles, SIMHASH_DISTANCE, BAND_COUNT,
+)
+from .Metrics import metrics
+from .Models import FeedEntry
+from .Storage import get_state, set_state
+from .SummaryText import summary_to_text, NO_SUMMARY
+
+# ------------------ Feed Registry ------------------
+# Keeps IN (...) lists well under SQLite's bound parameter limit
+LOOKUP_CHUNK = 500
+SEEDED_FEEDS_KEY = "seeded_feeds"
+
+def seed_feeds(conn: sqlite3.Connection, feeds):
+    '''
+    Registers the given feeds the first time they're seen
+
+    Seeded URLs are remembered in bot_state with their summary style, so a
+    default feed removed with /feed remove stays removed. A registered feed
+    keeps its name but takes the given summary style when it's seen for the
+    first time or the style differs from the one it was seeded with, and its
+    stored summary text is cleared for backfill_summary_text when that changed it.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        feeds (list): (name, url, summary_style) triples, summary_style may be None
+    '''
+
+    seeded = json.loads(get_state(conn, SEEDED_FEEDS_KEY) or "{}")
+    if isinstance(seeded, list):
+        # Older state only listed the URLs, the style each feed has now counts as seeded
+        styles = dict(conn.execute("SELECT url, summary_style FROM feeds"))
+        seeded = {url: styles.get(url) for url in seeded}
+
+    for name, url, style in feeds:
+        if url in seeded and seeded[url] == style:
+            continue
+        row = conn.execute("SELECT id, summary_style FROM feeds WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            # A seeded feed that's gone was removed on purpose. retention_days is
+            # given so older tables don't fill in their 90 day default
+            if url not in seeded:
+                conn.execute(
+                    "INSERT INTO feeds (name, url, summary_style, retention_days) VALUES (?, ?, ?, NULL)", (name, url, style)
+                )
+        elif row[1] != style:
+            conn.execute("UPDATE feeds SET summary_style = ? WHERE id = ?", (style, row[0]))
+            conn.execute("UPDATE entries SET summary_text = NULL WHERE feed_id = ?", (row[0],))
+        seeded[url] = style
+    set_state(conn, SEEDED_FEEDS_KEY, json.dumps(seeded, sort_keys=True))
+
+def add_feed(conn: sqlite3.Connection, name: str, url: str, style: str = None, retention_days: int = None):
+    '''
+    Registers a feed added at runtime
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        name (str): Name shown in announcements and the feed commands
+        url (str): Feed URL, unique across feeds
+        style (Optional [str]): Summary style from SummaryText, None for the default
+        retention_days (Optional [int]): Days entries are kept, None to keep them for good
+
+    Returns:
+        int: The new feed id, or None if a feed with that name or URL exists
+    '''
+
+    if conn.execute("SELECT 1 FROM feeds WHERE url = ? OR name = ? COLLATE NOCASE", (url, name)).fetchone():
+        return None
+    cur = conn.execute(
+        "INSERT INTO feeds (name, url, summary_style, retention_days) VALUES (?, ?, ?, ?)", (name, url, style, retention_days)
+    )
+    return cur.lastrowid
+
+def remove_feed(conn: sqlite3.Connection, feed_id: int) -> int:
+    '''
+    Unregisters a feed along with every entry ingested from it
+
+    Returns:
+        int: Number of deleted entries
+    '''
+
+    deleted = conn.execute("DELETE FROM entries WHERE feed_id = ?", (feed_id,)).rowcount
+    conn.execute("DELETE FROM feeds WHERE id = ?", (feed_id,))
+    return deleted
+
+def find_feed(conn: sqlite3.Connection, text: str):
+    '''
+    Resolves what was typed in a feed option, an autocompleted id, a name or a URL
+
+    Returns:
+        tuple: (id, name, url), or None if nothing matches
+    '''
+
+    text = text.strip()
+    if text.isdigit():
+        row = conn.execute("SELECT id, name, url FROM feeds WHERE id = ?", (int(text),)).fetchone()
+        if row:
+            return row
+    return conn.execute(
+        "SELECT id, name, url FROM feeds WHERE name = ? COLLATE NOCASE OR url = ?", (text, text)
+    ).fetchone()
+
+def list_feeds(conn: sqlite3.Connection):
+    '''
+    Reads every registered feed with a summary of what's stored for it
+
+    Returns:
+        list: (id, name, url, summary_style, retention_days, entry count, newest published) rows, by name
+    '''
+
+    return conn.execute(
+        """SELECT f.id, f.name, f.url, f.summary_style, f.retention_days, COUNT(e.id), MAX(e.published)
+        FROM feeds f
+        LEFT JOIN entries e ON e.feed_id = f.id
+        GROUP BY f.id
+        ORDER BY f.name COLLATE NOCASE"""
+    ).fetchall()
+# ------------------ Feed Registry End ------------------
+
+# ------------------ Ingest ------------------
+def existing_guids(conn: sqlite3.Connection, guids):
+    '''
+    Looks up which of the given guids are already stored
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        guids (list): GUIDs to check
+
+    Returns:
+        set: The GUIDs that already exist in entries
+    '''
+
+    found = set()
+    for i in range(0, len(guids), LOOKUP_CHUNK):
+        chunk = guids[i:i+LOOKUP_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        rows = conn.execute(f"SELECT guid FROM entries WHERE guid IN ({placeholders})", chunk)
+        found.update(row[0] for row in rows)
+    return found
+
+def ingest_entries(conn: sqlite3.Connection, batches, announce: bool = True, backlog=()):
+    '''
+    Inserts every new entry of a feed cycle, run through the writer so it lands in one transaction
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        batches (list): (feed_id, entries) pairs, entries newest first as returned by parse_feed_since
+        announce (Optional [bool]): False to store the entries as already posted, e.g. a new feed's backlog
+        backlog (Optional [set]): IDs of feeds read for the first time, their entries are stored as already posted too
+
+    Returns:
+        list: (feed_id, guid, entry) for each entry that was actually new
+    '''
+
+    candidates = {}
+    for feed_id, entries in batches:
+        advance_high_water(conn, feed_id, entries)
+        for e in entries:
+            guid = e.guid or e.link
+            if guid and guid not in candidates:
+                candidates[guid] = (feed_id, guid, e)
+
+    known = existing_guids(conn, list(candidates))
+    new = [c for guid, c in candidates.items() if guid not in known]
+    if not new:
+        return []
+
+    # Summaries are converted once here, reads only ever see the stored text.
+    # Only registered feeds have a style, which drops entries of a feed removed mid-poll
+    styles = summary_styles(conn, {feed_id for feed_id, _, _ in new})
+    new = [c for c in new if c[0] in styles]
+    now = int(time.time())
+    columns = (
+        "feed_id, guid, title, link, summary, summary_text, published, audio, posted, "
+        f"link_key, simhash, {BAND_NAMES}, duplicate_of"
+    )
+    # OR IGNORE covers anything inserted between the lookup and now
+    insert = f"INSERT OR IGNORE INTO entries ({columns}) VALUES ({', '.join('?' * (columns.count(',') + 1))})"
+    for feed_id, guid, e in new:
+        summary_text = summary_to_text(e.summary, styles.get(feed_id))
+        published = int(e.published.timestamp()) if e.published else None
+        link_key, fingerprint = entry_fingerprint(e.title, e.link, summary_text)
+
+        # Entries are inserted one at a time so later ones in the cycle are checked against earlier ones
+        duplicate_of = find_duplicate(conn, feed_id, e.title, link_key, fingerprint, published or now)
+        if duplicate_of is not None:
+            metrics.incr("duplicates")
+
+        conn.execute(insert, (
+            feed_id, guid, e.title, e.link, e.summary, summary_text, published, e.audio,
+            0 if announce and feed_id not in backlog and duplicate_of is None else 1,
+            link_key, fingerprint, *simhash_bands(fingerprint), duplicate_of,
+        ))
+    return new
+
+def summary_styles(conn: sqlite3.Connection, feed_ids):
+    feed_ids = list(feed_ids)
+    placeholders = ",".join("?" * len(feed_ids))
+    return dict(conn.execute(f"SELECT id, summary_style FROM feeds WHERE id IN ({placeholders})", feed_ids))
+
+def backfill_summary_text(conn: sqlite3.Connection) -> int:
+    '''
+    Fills in summary_text for entries stored before it existed or whose feed changed style
+
+    Returns:
+        int: Number of entries converted
+    '''
+
+    rows = conn.execute(
+        """SELECT e.id, e.summary, f.summary_style
+        FROM entries e
+        JOIN feeds f ON f.id = e.feed_id
+        WHERE e.summary_text IS NULL"""
+    ).fetchall()
+    conn.executemany(
+        "UPDATE entries SET summary_text = ? WHERE id = ?",
+        [(summary_to_text(summary, style), entry_id) for entry_id, summary, style in rows],
+    )
+    return len(rows)
+
+def newest_published(entries, now: int = None):
+    '''
+    Finds the high-water time of freshly ingested entries
+
+    Future dates are clamped to now so a scheduled item can't hide the ones released before it.
+
+    Args:
+        entries (list): FeedEntry objects
+        now (Optional [int]): Current epoch, defaults to the system clock
+
+    Returns:
+        int: The newest published epoch, or None if no entry has a date
+    '''
+
+    now = int(time.time()) if now is None else now
+    dates = [int(e.published.timestamp()) for e in entries if e.published]
+    return min(max(dates), now) if dates else None
+
+def advance_high_water(conn: sqlite3.Connection, feed_id: int, entries):
+    '''
+    Moves a feed's high-water mark to the newest of the entries just read
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        feed_id (int): Feed the entries came from
+        entries (list): FeedEntry objects in feed order, which may be oldest first
+    '''
+
+    if not entries:
+        return
+    # The guid goes with the newest date, wherever the feed puts it. Undated feeds are read in full, see HighWaterScan
+    dated = [e for e in entries if e.published]
+    newest = max(dated, key=lambda e: e.published) if dated else entries[0]
+    conn.execute(
+        """UPDATE feeds SET
+            last_guid = CASE WHEN :published IS NULL OR :published >= COALESCE(last_published, 0) THEN :guid ELSE last_guid END,
+            last_published = CASE WHEN :published > COALESCE(last_published, 0) THEN :published ELSE last_published END
+        WHERE id = :id""",
+        {"guid": newest.guid or newest.link, "published": newest_published(entries), "id": feed_id},
+    )
+
+def pending_announcements(conn: sqlite3.Connection, limit: int):
+    '''
+    Reads the oldest entries that haven't been announced yet
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        limit (int): Maximum number of entries
+
+    Returns:
+        list: (guid, feed name, title, link) rows, oldest first
+    '''
+
+    return conn.execute(
+        """SELECT e.guid, f.name, e.title, e.link
+        FROM entries e
+        JOIN feeds f ON f.id = e.feed_id
+        WHERE e.posted = 0
+        ORDER BY e.published, e.id
+        LIMIT ?""",
+        (limit,),
+    ).fetchall()
+
+def mark_posted(conn: sqlite3.Connection, guids):
+    '''
+    Marks the given entries as announced
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        guids (list): GUIDs of the announced entries
+    '''
+
+    if guids:
+        conn.executemany("UPDATE entries SET posted = 1 WHERE guid = ?", [(g,) for g in guids])
+# ------------------ Ingest End ------------------
+
+# ------------------ Duplicates ------------------
+# Copies of a story from other feeds are looked for within this many days of its publication
+DUPLICATE_WINDOW_DAYS = 3
+BAND_NAMES = ", ".join(f"simhash_band{band}" for band in range(BAND_COUNT))
+# Bumped whenever entry_fingerprint changes, so stored fingerprints are recomputed once
+FINGERPRINT_VERSION = "2"
+FINGERPRINT_VERSION_KEY = "fingerprint_version"
+
+def entry_fingerprint(title: str, link: str, summary_text: str):
+    '''
+    Returns:
+        tuple: (canonical link, SimHash of the title and the lead of the summary text), either may be None
+    '''
+
+    text = story_text(title, summary_text if summary_text != NO_SUMMARY else None)
+    return canonical_link(link), simhash(text)
+
+def find_duplicate(conn: sqlite3.Connection, feed_id: int, title: str, link_key: str, fingerprint: int, published: int):
+    '''
+    Finds an entry from another feed that already covers the same story
+
+    Candidates share the canonical link or one SimHash band and were published
+    within DUPLICATE_WINDOW_DAYS. A SimHash match also needs similar titles, so
+    entries that only share boilerplate aren't taken for copies. Every branch is
+    an equality lookup on its own index, so the work depends on how many entries
+    match, not on the store size.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        feed_id (int): Feed of the new entry, its own entries are deduplicated by guid
+        title (str): Title of the new entry
+        link_key (str): Canonical link of the new entry
+        fingerprint (int): SimHash of the new entry
+        published (int): Publication epoch of the new entry
+
+    Returns:
+        int: ID of the original entry, or None
+    '''
+
+    lookups = [("link_key", link_key)] if link_key is not None else []
+    if fingerprint is not None:
+        lookups += [(f"simhash_band{band}", value) for band, value in enumerate(simhash_bands(fingerprint))]
+    if not lookups:
+        return None
+
+    window = DUPLICATE_WINDOW_DAYS * 86400
+    sql = " UNION ".join(
+        f"""SELECT id, title, link_key, simhash FROM entries
+        WHERE {column} = ? AND published BETWEEN ? AND ? AND feed_id != ? AND duplicate_of IS NULL"""
+        for column, _ in lookups
+    )
+    params = []
+    for _, value in lookups:
+        params += (value, published - window, published + window, feed_id)
+
+    rows = conn.execute(f"{sql} ORDER BY id", params)
+    for entry_id, other_title, key, other in rows:
+        if link_key is not None and key == link_key:
+            return entry_id
+        if (
+            fingerprint is not None and other is not None
+            and hamming_distance(fingerprint, other) <= SIMHASH_DISTANCE and similar_titles(title, other_title)
+        ):
+            return entry_id
+    return None
+
+def backfill_fingerprints(conn: sqlite3.Connection) -> int:
+    '''
+    Fingerprints entries stored before duplicate detection or an older FINGERPRINT_VERSION
+
+    Runs once per version, recorded in bot_state, so entries without a link
+    or enough words for a SimHash aren't scanned again on every start.
+
+    Returns:
+        int: Number of entries fingerprinted
+    '''
+
+    if get_state(conn, FINGERPRINT_VERSION_KEY) == FINGERPRINT_VERSION:
+        return 0
+
+    rows = conn.execute("SELECT id, title, link, summary_text FROM entries").fetchall()
+    updates = []
+    fingerprinted = 0
+    for entry_id, title, link, summary_text in rows:
+        link_key, fingerprint = entry_fingerprint(title, link, summary_text)
+        if link_key is not None or fingerprint is not None:
+            fingerprinted += 1
+        updates.append((link_key, fingerprint, *simhash_bands(fingerprint), entry_id))
+    bands = ", ".join(f"{column} = ?" for column in BAND_NAMES.split(", "))
+    conn.executemany(f"UPDATE entries SET link_key = ?, simhash = ?, {bands} WHERE id = ?", updates)
+    set_state(conn, FINGERPRINT_VERSION_KEY, FINGERPRINT_VERSION)
+    return fingerprinted
+# ------------------ Duplicates End ------------------
+
+# ------------------ Search ------------------
+# Quoted phrases or bare terms, a trailing * on a term makes it a prefix query
+FTS_TOKEN = re.compile(r'"([^"]+)"|(\S+)')
+
+def build_fts_query(query: str) -> str:
+    '''
+    Turns user input into a safe FTS5 MATCH expression
+
+    Every term is quoted so FTS5 operators in user input are treated as text.
+    "exact phrases" stay phrases and term* stays a prefix query.
+
+    Args:
+        query (str): The search text typed by the user
+
+    Returns:
+        str: FTS5 query with all terms ANDed, empty if there was nothing to search for
+    '''
+
+    parts = []
+    for phrase, term in FTS_TOKEN.findall(query):
+        text = phrase or term
+        prefix = not phrase and text.endswith("*")
+        text = text.rstrip("*").replace('"', '""').strip()
+        if text:
+            parts.append(f'"{text}"' + ("*" if prefix else ""))
+    return " ".join(parts)
+
+def row_to_entry(row, feed: str = None, cursor: tuple = None):
+    '''
+    Converts a (title, link, summary_text, published, audio) row to the entry used by the paginators
+
+    Args:
+        row (tuple): Row selected from entries
+        feed (Optional [str]): Name of the source, for the timeline
+        cursor (Optional [tuple]): Keyset position, for the timeline
+
+    Returns:
+        FeedEntry: The entry
+    '''
+
+    title, link, summary_text, published, audio = row
+    return FeedEntry(
+        title=title or "No title",
+        link=link or "",
+        summary="",
+        summary_text=summary_text,
+        published=datetime.fromtimestamp(published, timezone.utc) if published is not None else None,
+        audio=audio,
+        feed=feed,
+        cursor=cursor,
+    )
+
+def search_sql(query: str, feed_url: str = None):
+    # Shared FROM/WHERE of the search queries, None when there's nothing to search for
+    match = build_fts_query(query)
+    if not match:
+        return None, None
+
+    sql = """FROM entries_fts
+        JOIN entries e ON e.id = entries_fts.rowid
+        JOIN feeds f ON f.id = e.feed_id
+        WHERE entries_fts MATCH ?"""
+    params = [match]
+    if feed_url:
+        sql += " AND f.url = ?"
+        params.append(feed_url)
+    return sql, params
+
+def search_entries(conn: sqlite3.Connection, query: str, feed_url: str = None, limit: int = 100, offset: int = 0):
+    '''
+    Ranked full-text search over every ingested entry
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        query (str): The search text typed by the user
+        feed_url (Optional [str]): Only search entries of this feed
+        limit (Optional [int]): Maximum number of results
+        offset (Optional [int]): Results to skip, for paging
+
+    Returns:
+        list: Matching entries, best match first
+    '''
+
+    sql, params = search_sql(query, feed_url)
+    if sql is None:
+        return []
+
+    # Title hits weigh more than summary hits
+    sql = f"SELECT e.title, e.link, e.summary_text, e.published, e.audio {sql} ORDER BY bm25(entries_fts, 10.0, 1.0), e.id LIMIT ? OFFSET ?"
+    return [row_to_entry(row) for row in conn.execute(sql, params + [limit, offset])]
+
+def count_search_matches(conn: sqlite3.Connection, query: str, feed_url: str = None, cap: int = 100) -> int:
+    '''
+    Counts search matches, stopping at cap like search_entries does
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        query (str): The search text typed by the user
+        feed_url (Optional [str]): Only count entries of this feed
+        cap (Optional [int]): Highest count returned
+
+    Returns:
+        int: Number of matches, at most cap
+    '''
+
+    sql, params = search_sql(query, feed_url)
+    if sql is None:
+        return 0
+    return conn.execute(f"SELECT COUNT(*) FROM (SELECT 1 {sql} LIMIT ?)", params + [cap]).fetchone()[0]
+# ------------------ Search End ------------------
+
+# ------------------ Timeline ------------------
+def recent_entries(conn: sqlite3.Connection, feed_url: str, since: int, offset: int = 0, limit: int = 1):
+    '''
+    Reads a feed's entries published since the given time, newest first
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        feed_url (str): Feed to read
+        since (int): Epoch of the oldest entry to include
+        offset (Optional [int]): Entries to skip, for paging
+        limit (Optional [int]): Maximum number of entries
+
+    Returns:
+        list: The entries
+    '''
+
+    rows = conn.execute(
+        """SELECT e.title, e.link, e.summary_text, e.published, e.audio
+        FROM entries e
+        JOIN feeds f ON f.id = e.feed_id
+        WHERE f.url = ? AND e.published >= ?
+        ORDER BY e.published DESC, e.id DESC
+        LIMIT ? OFFSET ?""",
+        (feed_url, since, limit, offset),
+    )
+    return [row_to_entry(row) for row in rows]
+
+def count_recent_entries(conn: sqlite3.Connection, feed_url: str, since: int) -> int:
+    return conn.execute(
+        """SELECT COUNT(*) FROM entries e
+        JOIN feeds f ON f.id = e.feed_id
+        WHERE f.url = ? AND e.published >= ?""",
+        (feed_url, since),
+    ).fetchone()[0]
+
+def news_page(conn: sqlite3.Connection, cursor: tuple = None, older: bool = True, limit: int = 1):
+    '''
+    Reads one page of the cross-source timeline, newest first, using keyset pagination
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        cursor (Optional [tuple]): (published, id) of the entry to page from, None for the newest page
+        older (Optional [bool]): True for the entries after the cursor, False for the ones before it
+        limit (Optional [int]): Entries per page
+
+    Returns:
+        list: Entries of the page, newest first, each with its cursor and feed name
+    '''
+
+    sql = """SELECT e.title, e.link, e.summary_text, e.published, e.audio, e.id, f.name
+        FROM entries e
+        JOIN feeds f ON f.id = e.feed_id
+        WHERE e.published IS NOT NULL"""
+    params = []
+    if cursor is not None:
+        sql += " AND (e.published, e.id) < (?, ?)" if older else " AND (e.published, e.id) > (?, ?)"
+        params.extend(cursor)
+    sql += " ORDER BY e.published DESC, e.id DESC" if older else " ORDER BY e.published ASC, e.id ASC"
+    sql += " LIMIT ?"
+    params.append(limit)
+
+    page = [row_to_entry(row[:5], feed=row[6], cursor=(row[3], row[5])) for row in conn.execute(sql, params)]
+
+    # Newer pages are read in ascending order, flip them back to newest first
+    if not older:
+        page.reverse()
+    return page
+# ------------------ Timeline End ------------------
+
+# ------------------ Publish History ------------------
+def publish_history(conn: sqlite3.Connection, feed_ids, limit: int = 20):
+    '''
+    Reads the most recent publication times of each feed, for the poll scheduler
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        feed_ids (list): Feeds to read
+        limit (Optional [int]): Publication times per feed
+
+    Returns:
+        dict: feed_id -> published epochs, oldest first
+    '''
+
+    history = {}
+    for feed_id in feed_ids:
+        rows = conn.execute(
+            """SELECT published FROM entries
+            WHERE feed_id = ? AND published IS NOT NULL
+            ORDER BY published DESC LIMIT ?""",
+            (feed_id, limit),
+        ).fetchall()
+        history[feed_id] = [row[0] for row in reversed(rows)]
+    return history
+# ------------------ Publish History End ------------------
+
+# ------------------ Retention ------------------
+def purge_expired(conn: sqlite3.Connection, now: int = None):
+    '''
+    Deletes entries older than their feed's retention window, feeds without one keep everything
+
+    Each feed is one indexed range delete on (feed_id, published).
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        now (Optional [int]): Current epoch, defaults to the system clock
+
+    Returns:
+        int: Number of deleted entries
+    '''
+
+    now = int(time.time()) if now is None else now
+    feeds = conn.execute("SELECT id, retention_days FROM feeds WHERE retention_days IS NOT NULL").fetchall()
+
+    deleted = 0
+    for feed_id, days in feeds:
+        cur = conn.execute(
+            "DELETE FROM entries WHERE feed_id = ? AND published < ?",
+            (feed_id, now - days * 86400),
+        )
+        deleted += cur.rowcount
+    return deleted
+# ------------------ Retention End ------------------
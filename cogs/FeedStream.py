@@ -0,0 +1,280 @@
+# Imports
+import asyncio
+
+from xml.etree import ElementTree
+from .Models import FeedEntry
+from .FetchUtils import fetch_feed, stream_feed
+from .DateUtils import parse_date
+from .FeedUtils import parse_body, build_feed_results
+from .Metrics import metrics
+
+# ------------------ Streaming Parser ------------------
+# Only elements from these namespaces are read, so itunes:title and friends never shadow the real fields
+CORE_NAMESPACES = {
+    "",
+    "http://www.w3.org/2005/Atom",
+    "http://purl.org/rss/1.0/",
+    "http://purl.org/dc/elements/1.1/",
+}
+ITEM_TAGS = {"item", "entry"}
+SUMMARY_TAGS = ("description", "summary", "content")
+DATE_TAGS = ("pubDate", "published", "updated", "date")
+
+def core_name(tag: str):
+    '''
+    Strips the namespace off a core RSS/Atom tag
+
+    Args:
+        tag (str): ElementTree tag, {namespace}local when namespaced
+
+    Returns:
+        str: The local name, or None for tags outside the core namespaces
+    '''
+
+    if not tag.startswith("{"):
+        return tag
+    namespace, _, local = tag[1:].partition("}")
+    return local if namespace in CORE_NAMESPACES else None
+
+def entry_from_element(elem, include_audio: bool = False):
+    '''
+    Builds a FeedEntry from a single RSS <item> or Atom <entry>
+
+    Args:
+        elem (xml.etree.ElementTree.Element): The finished item element
+        include_audio (Optional [bool]): True if given source uses audio, False if audio is not used
+
+    Returns:
+        FeedEntry: The entry, built the same way as build_feed_results
+    '''
+
+    fields = {}
+    link = None
+    audio = None
+    for child in elem:
+        name = core_name(child.tag)
+        if name == "link":
+            href = child.get("href")
+            rel = child.get("rel", "alternate")
+            if href is None:
+                link = link or (child.text or "").strip()
+            elif rel == "enclosure":
+                audio = audio or href
+            elif rel == "alternate":
+                link = link or href
+        elif name == "enclosure":
+            audio = audio or child.get("url")
+        elif name and name not in fields:
+            fields[name] = "".join(child.itertext()).strip()
+
+    published = None
+    for name in DATE_TAGS:
+        if fields.get(name):
+            published = parse_date(fields[name])
+            break
+
+    link = link or ""
+    return FeedEntry(
+        title=fields.get("title") or "No title",
+        link=link,
+        summary=next((fields[name] for name in SUMMARY_TAGS if fields.get(name)), ""),
+        published=published,
+        audio=(audio or "") if include_audio else None,
+        guid=fields.get("guid") or fields.get("id") or link,
+    )
+
+class FeedStream:
+    '''
+    Incremental RSS/Atom parser fed one chunk of bytes at a time
+
+    Each item is turned into a FeedEntry as soon as its closing tag arrives
+    and is then dropped from the tree, so memory stays at one item no matter
+    how long the feed is.
+    '''
+
+    def __init__(self, include_audio: bool = False):
+        self.include_audio = include_audio
+        self._parser = ElementTree.XMLPullParser(events=("start", "end"))
+        self._open = []  # elements started but not yet closed
+
+    def feed(self, chunk: bytes):
+        '''
+        Parses the next chunk of the document
+
+        Args:
+            chunk (bytes): Next piece of the feed body
+
+        Yields:
+            FeedEntry: Each item completed by this chunk, in document order
+        '''
+
+        self._parser.feed(chunk)
+        yield from self._entries()
+
+    def close(self):
+        '''
+        Finishes the document
+
+        Returns:
+            list: Entries completed by the end of the document
+        '''
+
+        self._parser.close()
+        return list(self._entries())
+
+    def _entries(self):
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                self._open.append(elem)
+                continue
+
+            self._open.pop()
+            if core_name(elem.tag) not in ITEM_TAGS:
+                continue
+            entry = entry_from_element(elem, self.include_audio)
+            elem.clear()
+            if self._open:
+                self._open[-1].remove(elem)
+            yield entry
+# ------------------ Streaming Parser End ------------------
+
+# ------------------ High-Water Mark ------------------
+# Entries a little older than the mark are still read, in case a feed backdates a new item
+HIGH_WATER_SLACK = 24 * 60 * 60
+
+def reached_high_water(entry, high_water):
+    '''
+    Checks whether a feed has been read back to the entries ingested last time
+
+    Args:
+        entry (FeedEntry): The entry just parsed
+        high_water (tuple): (last_guid, last_published) of the feed, either may be None
+
+    Returns:
+        bool: True once the entry is the last seen one or clearly older than it
+    '''
+
+    last_guid, last_published = high_water
+    if last_guid is not None and (entry.guid or entry.link) == last_guid:
+        return True
+    if last_published is None or entry.published is None:
+        return False
+    return entry.published.timestamp() < last_published - HIGH_WATER_SLACK
+
+class HighWaterScan:
+    '''
+    Collects the entries of a feed that are newer than its high-water mark
+
+    Most feeds list the newest entry first, and the scan stops at the mark.
+    Some list oldest first, and there stopping would skip every new entry. So
+    the order is judged from the dates read so far. A date older than the mark
+    only stops the scan once the feed has been seen going back in time. The
+    last seen guid stops it unless the feed has been seen going forward. Any
+    other entry at or behind the mark is skipped and the scan goes on.
+
+    A feed without dates has no order to judge, it was stored with no
+    last_published. Its last guid may be the oldest entry, so such a feed is
+    read in full and ingest_entries drops the guids it already has.
+    '''
+
+    def __init__(self, high_water):
+        self.high_water = high_water
+        self.entries = []
+        self.stopped = False
+        self.descending = None  # None until two dated entries were compared
+        self._previous = None   # Published time of the last dated entry
+
+    def take(self, entries) -> bool:
+        '''
+        Scans the next entries in document order
+
+        Args:
+            entries (iterable): FeedEntry objects
+
+        Returns:
+            bool: True once the scan can stop, nothing after the mark is new
+        '''
+
+        last_guid, last_published = self.high_water
+        for entry in entries:
+            self._note_order(entry)
+            if not reached_high_water(entry, self.high_water):
+                self.entries.append(entry)
+                continue
+            seen = last_guid is not None and last_published is not None and (entry.guid or entry.link) == last_guid
+            if (seen and self.descending is not False) or self.descending:
+                self.stopped = True
+                return True
+        return False
+
+    def _note_order(self, entry):
+        if entry.published is None:
+            return
+        published = entry.published.timestamp()
+        if self._previous is not None:
+            if published > self._previous:
+                self.descending = False
+            elif published < self._previous and self.descending is None:
+                self.descending = True
+        self._previous = published
+
+def take_until_high_water(entries, high_water):
+    '''
+    Collects the entries newer than the high-water mark in one go
+
+    Args:
+        entries (iterable): FeedEntry objects in feed order
+        high_water (tuple): (last_guid, last_published) of the feed
+
+    Returns:
+        tuple: The new entries and whether the scan stopped at the mark
+    '''
+
+    scan = HighWaterScan(high_water)
+    scan.take(entries)
+    return scan.entries, scan.stopped
+# ------------------ High-Water Mark End ------------------
+
+# ------------------ Incremental Fetching ------------------
+async def parse_feed_since(feed_url: str, high_water=(None, None), include_audio: bool = False, validators: dict = None):
+    '''
+    Reads only the entries added to a feed since its high-water mark
+
+    The body is parsed while it downloads and the download stops at the first
+    already-seen entry, so a large feed with one new episode costs one episode.
+    Each chunk is parsed in a worker thread, like the full parses, so a first
+    read of a long backlog doesn't hold up the event loop. Feeds that aren't
+    well-formed XML fall back to a full feedparser pass.
+
+    Args:
+        feed_url (str): The RSS source to be read
+        high_water (Optional [tuple]): (last_guid, last_published) of the feed, (None, None) reads everything
+        include_audio (Optional [bool]): True if given source uses audio, False if audio is not used
+        validators (Optional [dict]): "etag" and "modified" values from the previous fetch
+
+    Returns:
+        tuple: The new entries in feed order (empty on 304 Not Modified) and the validators to send next time
+    '''
+
+    stream = FeedStream(include_audio)
+    scan = HighWaterScan(high_water)
+    entries = scan.entries
+
+    async def consume(chunk):
+        return await asyncio.to_thread(lambda: scan.take(stream.feed(chunk)))
+
+    with metrics.timer("feed_stream"):
+        try:
+            changed, validators = await stream_feed(feed_url, consume, validators)
+            if changed and not scan.stopped:
+                await asyncio.to_thread(lambda: scan.take(stream.close()))
+            metrics.incr("feed_stream", result="early_stop" if scan.stopped else "full" if changed else "304")
+        except ElementTree.ParseError as e:
+            print(f"[parse_feed_since] {feed_url} isn't well-formed XML ({e}), falling back to a full parse")
+            metrics.incr("feed_stream", result="fallback")
+            body, validators = await fetch_feed(feed_url)
+            entries, _ = await asyncio.to_thread(
+                parse_body, body, lambda feed: take_until_high_water(build_feed_results(feed, include_audio), high_water)
+            )
+    return entries, validators
+# ------------------ Incremental Fetching End ------------------
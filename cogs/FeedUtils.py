@@ -1,92 +1,119 @@
+import asyncio
 import discord
-import feedparser
 import re
 
 from html import unescape
-from datetime import datetime, timezone, timedelta  
-from dateutil import parser as dateparser
+from .CacheUtils import TTLCache
+from .DateUtils import parse_date
+from .Models import FeedEntry, CTFEntry
+from .FetchUtils import fetch_feed
+from .Metrics import metrics
+from .SummaryText import summary_to_text
 
-# ------------------ HTML Cleaners ------------------
-def clean_summary(summary: str, max_length: int = 1000) -> str:
+# ------------------ Feed Parsing ------------------
+# Shared by every command and the feed loop, values are (validators, results) per (feed_url, variant)
+FEED_CACHE_TTL = 300
+FEED_CACHE_SIZE = 32
+feed_cache = TTLCache(ttl=FEED_CACHE_TTL, maxsize=FEED_CACHE_SIZE)
+
+async def fetch_and_parse(feed_url: str, variant, build_results, fresh: bool = False):
     '''
-    Cleans up html tags in the given RSS source and returns a clean version
+    Fetches a feed through the shared cache, building results off-thread
     
     Args:
-        summary (str): Provided summary of the RSS source
-        max_length (Optional [int]): Maximum of length of summary to be used
+        feed_url (str): The RSS source to be fetched
+        variant: Identifies how the results were built, part of the cache key
+        build_results (callable): Turns a parsed feedparser feed into the list of results
+        fresh (Optional [bool]): True to wait for a revalidated copy instead of serving a stale one
     
     Returns:
-        str: Cleaned up summary with no tags
+        list: The built results, or the previous results when the feed is unchanged
     '''
     
-    if not summary:
-        return "No summary available."
+    async def load(previous):
+        validators, cached = previous or (None, None)
+
+        # Only ask for a 304 when there is something to fall back on
+        with metrics.timer("feed_fetch", kind=variant[0]):
+            body, validators = await fetch_feed(feed_url, validators if cached is not None else None)
+        if body is None:
+            metrics.incr("feed_fetch", status="304")
+            return validators, cached
+        metrics.incr("feed_fetch", status="200")
+
+        with metrics.timer("feed_parse", kind=variant[0]):
+            results = await asyncio.to_thread(parse_body, body, build_results)
+        return validators, results
+
+    key = (feed_url, variant)
+    if fresh:
+        _, results = await feed_cache.refresh(key, load)
+    else:
+        _, results = await feed_cache.get(key, load)
+    return results
+
+def parse_body(body: bytes, build_results):
+    '''
+    Runs feedparser over a fetched body, meant for a worker thread
 
-    summary = unescape(summary)
-    summary = re.sub(r"<[^>]+>", "", summary)
-    summary = re.sub(r"\n\s*\n", "\n\n", summary).strip()
-    if len(summary) > max_length:
-        summary = summary[:max_length] + "..."
+    feedparser is imported here rather than at startup, so the first parse pays for it off the event loop.
+    '''
 
-    return summary
+    import feedparser
+    return build_results(feedparser.parse(body))
 
-# Does not work properly 
-def clean_ctbb_summary(summary: str, max_length: int = 800) -> str:
+async def parse_feed(feed_url: str, include_audio: bool = False, fresh: bool = False):
     '''
-    Specialized cleaner for CTBB to get rid of footer notes
+    Grabs the feed for a given RSS source and retreives all needed information:
+        title, link, summary, published, audio, and guid
     
     Args:
-        summary (str): Provided summary of the RSS source
-        max_length (Optional [int]): Maximum of length of summary to be used
+        feed_url (str): The RSS source to be parsed through
+        include_audio (Optional [bool]): True if given source uses audio, False if audio is not used
+        fresh (Optional [bool]): True to bypass stale cached results
     
     Returns:
-        str: Cleaned up summary with no tags and no footer
+        list: A FeedEntry for each entry in the feed
     '''
     
-    if not summary:
-        return "No summary available."
-    summary = unescape(summary)
-    summary = re.sub(r"<[^>]+>", "", summary)
-
-    # Remove everything after the "======" 
-    summary = re.split(r"={2,}.*", summary, maxsplit=1)[0]
-    summary = re.sub(r"\s*\n\s*", "\n", summary).strip()
-
-    if len(summary) > max_length:
-        summary = summary[:max_length] + "..."
-
-    return summary
-# ------------------ HTML Cleaners End------------------
+    return await fetch_and_parse(
+        feed_url, ("feed", include_audio), lambda feed: build_feed_results(feed, include_audio), fresh
+    )
 
-# ------------------ Feed Parsing ------------------
-def parse_feed(feed_url: str, include_audio: bool = False):
+async def parse_ctf_feed(feed_url: str, fresh: bool = False):
     '''
-    Grabs the feed for a given RSS source and retreives all needed information:
-        title, link, summary, published, audio, and raw entry
+    Specific handler for CTFtime source
     
     Args:
         feed_url (str): The RSS source to be parsed through
+        fresh (Optional [bool]): True to bypass stale cached results
+    
+    Returns:
+        list: A CTFEntry for each ctf entry
+    '''
+    
+    return await fetch_and_parse(feed_url, ("ctf",), build_ctf_results, fresh)
+
+def build_feed_results(feed, include_audio: bool = False):
+    '''
+    Builds the entries for an already parsed RSS source
+    
+    Args:
+        feed (feedparser.FeedParserDict): The parsed feed
         include_audio (Optional [bool]): True if given source uses audio, False if audio is not used
     
     Returns:
-        dictionary: The title, link, summary, published date, audio link, and raw entry of each entry in the feed  
+        list: A FeedEntry for each entry in the feed
     '''
     
-    feed = feedparser.parse(feed_url)
     results = []
     for entry in feed.entries:
         # Attempt to parse published/updated date
         published = None
         if hasattr(entry, "published"):
-            try:
-                published = dateparser.parse(entry.published).astimezone(timezone.utc)
-            except Exception:
-                pass
+            published = parse_date(entry.published)
         elif hasattr(entry, "updated"):
-            try:
-                published = dateparser.parse(entry.updated).astimezone(timezone.utc)
-            except Exception:
-                pass
+            published = parse_date(entry.updated)
 
         audio_link = ""
         
@@ -101,219 +128,190 @@ def parse_feed(feed_url: str, include_audio: bool = False):
             except Exception:
                 pass
 
-        results.append({
-            "title": entry.get("title", "No title"),
-            "link": entry.get("link", ""),
-            "summary": entry.get("summary", "") or entry.get("description", ""),
-            "published": published,
-            "audio": audio_link if include_audio else None,
-            
-            # Keep raw entry in case needed later
-            "raw": entry
-        })
+        link = entry.get("link", "")
+        results.append(FeedEntry(
+            title=entry.get("title", "No title"),
+            link=link,
+            summary=entry.get("summary", "") or entry.get("description", ""),
+            published=published,
+            audio=audio_link if include_audio else None,
+
+            # Stable GUID, using the entry id if present
+            guid=entry.get("id") or entry.get("guid") or link,
+        ))
     return results
 
-def parse_ctf_feed(feed_url: str):
+def build_ctf_results(feed):
     '''
-    Specific handler for CTFtime source
+    Builds the entries for an already parsed CTFtime source, pulling out the fields the embeds show
     
     Args:
-        feed_url (str): The RSS source to be parsed through
+        feed (feedparser.FeedParserDict): The parsed feed
     
     Returns:
-        dictionary: The title, link, summary, start date, and raw entry of each ctf entry 
+        list: A CTFEntry for each ctf entry
     '''
     
-    feed = feedparser.parse(feed_url)
     results = []
     for entry in feed.entries:
         start_date = None
         if hasattr(entry, "start_date"):
-            try:
-                start_date = dateparser.parse(entry.start_date).astimezone(timezone.utc)
-            except Exception:
-                pass
+            start_date = parse_date(entry.start_date)
         elif hasattr(entry, "published"):
-            try:
-                start_date = dateparser.parse(entry.published).astimezone(timezone.utc)
-            except Exception:
-                pass
+            start_date = parse_date(entry.published)
         
-        results.append({
-            "title": entry.get("title", "Unknown"),
-            "link": entry.get("link", ""),
-            "summary": entry.get("summary", ""),
-            "start_date": start_date,
-            "raw": entry
-        })
+        # Fields are read with the tags still in place, they end each "Label: value" line
+        summary = entry.get("summary", "")
+        unescaped = unescape(summary)
+        official_url = extract_official_url(entry, unescaped)
+        results.append(CTFEntry(
+            title=entry.get("title", "Unknown"),
+            link=entry.get("link", ""),
+            summary=summary,
+            start_date=start_date,
+            weight=extract_ctf_field(unescaped, "Weight"),
+            format=extract_ctf_field(unescaped, "Format"),
+            official_url=official_url if official_url != "Unknown" else None,
+        ))
     return results
 # ------------------ Feed Parsing End ------------------
 
-# ------------------ Filtering ------------------
-def filter_recent(entries, days: int = 30):
+# ------------------ Embed Pagination ------------------
+CTF_FIELD_PATTERNS = {
+    label: re.compile(rf"{label}:\s*([^\n\r<]+)", re.IGNORECASE)
+    for label in ("Weight", "Format", "Official URL")
+}
+
+def extract_ctf_field(summary: str, label: str):
     '''
-    Search filter for the given RSS source
+    Pulls a "Label: value" line out of a CTFtime summary
     
     Args:
-        entries (dictionary): Dictionary of entries to filter out
-        days (int): How many days to filter by
+        summary (str): Cleaned CTFtime summary
+        label (str): One of Weight, Format or Official URL
     
     Returns:
-        list: A list of entries before the cutoff date
+        str: The value, or "Unknown" if the summary doesn't have it
     '''
     
-    now = datetime.now(timezone.utc)
-    cutoff = now - timedelta(days=days)
-    return [e for e in entries if e["published"] and e["published"] >= cutoff]
-# ------------------ Filtering ------------------
+    match = CTF_FIELD_PATTERNS[label].search(summary)
+    if match:
+        return match.group(1).strip()
+    return "Unknown"
 
-# ------------------ Embed Pagination ------------------
-def make_paginated_view(entries, list_title: str, color: discord.Color, link_label: str = "Read/Listen"):
+def extract_official_url(raw, summary: str):
+    '''
+    Finds the official site of a CTF from its summary or raw CTFtime entry
+    
+    Args:
+        raw (feedparser.FeedParserDict): Raw CTFtime entry
+        summary (str): Unescaped CTFtime summary
+    
+    Returns:
+        str: The URL, or "Unknown"
+    '''
+    
+    url = extract_ctf_field(summary, "Official URL")
+    if url != "Unknown":
+        return url
+
+    if "official_url" in raw:
+        return raw["official_url"]
+    if "url" in raw:
+        return raw["url"]
+    if "link" in raw and "ctftime.org/event" not in raw["link"]:
+        return raw["link"]
+
+    return "Unknown"
+
+def build_entry_embed(entry, color: discord.Color, link_label: str, footer: str):
     '''
-    Creates a paginated entry for each given RSS source
+    Builds the embed for a single feed entry
     
     Args:
-        entries (dictionary): Dictionary of entries to add to page
-        list_title (str): Title of given source
-        color (discord.Color): Color used for the paginator
+        entry (FeedEntry): Entry to show
+        color (discord.Color): Color used for the embed
         link_label (str): Label for the link to the source
+        footer (str): Footer text, usually the position in the list
+    
+    Returns:
+        discord.Embed: The entry embed
     '''
     
-    per_page = 1
-    pages = [entries[i:i+per_page] for i in range(0, len(entries), per_page)]
-
-    def build_embed(page_index: int):
-        entry = pages[page_index][0]
-        summary = clean_summary(entry["summary"], max_length=800)
-
-        # Published time formatting
-        if entry["published"]:
-            ts = int(entry["published"].timestamp())
-            published_str = f"<t:{ts}:F> (<t:{ts}:R>)"
-        else:
-            published_str = "Unknown"
-
-        # Build embed
-        embed = discord.Embed(
-            title=entry["title"],
-            url=entry["link"],
-            description=summary,
-            color=color
-        )
-        embed.add_field(name="Published", value=published_str, inline=False)
-
-        link_display = entry.get("audio") or entry["link"]
-        embed.add_field(name=link_label, value=link_display, inline=False)
-
-        embed.set_footer(text=f"Result {page_index+1}/{len(pages)} — {list_title}")
-        return embed
-
-    # Good ole paginator
-    class Paginator(discord.ui.View):
-        def __init__(self):
-            super().__init__(timeout=1000)
-            self.page = 0
-
-        @discord.ui.button(label="⬅️", style=discord.ButtonStyle.secondary)
-        async def previous(self, interaction_btn: discord.Interaction, button: discord.ui.Button):
-            self.page = (self.page - 1) % len(pages)
-            await interaction_btn.response.edit_message(embed=build_embed(self.page), view=self)
-
-        @discord.ui.button(label="➡️", style=discord.ButtonStyle.secondary)
-        async def next(self, interaction_btn: discord.Interaction, button: discord.ui.Button):
-            self.page = (self.page + 1) % len(pages)
-            await interaction_btn.response.edit_message(embed=build_embed(self.page), view=self)
-
-    return build_embed(0), Paginator()
-
-def make_ctf_paginated_view(entries, list_title: str, color: discord.Color):
+    summary = entry.summary_text or summary_to_text(entry.summary)
+
+    # Published time formatting
+    if entry.published:
+        ts = int(entry.published.timestamp())
+        published_str = f"<t:{ts}:F> (<t:{ts}:R>)"
+    else:
+        published_str = "Unknown"
+
+    # Build embed
+    embed = discord.Embed(
+        title=entry.title,
+        url=entry.link,
+        description=summary,
+        color=color
+    )
+    embed.add_field(name="Published", value=published_str, inline=False)
+
+    link_display = entry.audio or entry.link
+    embed.add_field(name=link_label, value=link_display, inline=False)
+
+    embed.set_footer(text=footer)
+    return embed
+
+def build_ctf_page_embed(entries, list_title: str, color: discord.Color, page_index: int, page_count: int):
     '''
-    Creates a paginated entry for each given RSS source
+    Builds one page of a CTF list
     
     Args:
-        entries (dictionary): Dictionary of entries to add to page
-        list_title (str): Title of given source
-        color (discord.Color): Color used for the paginator
+        entries (list): CTFEntry objects on the page
+        list_title (str): Title of the list
+        color (discord.Color): Color used for the embed
+        page_index (int): Zero based page number
+        page_count (int): Number of pages in the list
+    
+    Returns:
+        discord.Embed: The page embed
     '''
     
-    per_page = 3
-    pages = [entries[i:i+per_page] for i in range(0, len(entries), per_page)]
-
-    def extract_field(summary: str, label: str):
-        pattern = rf"{label}:\s*([^\n\r<]+)"
-        match = re.search(pattern, summary, re.IGNORECASE)
-        if match:
-            return match.group(1).strip()
-        return "Unknown"
-
-    def extract_official_url(entry, summary: str):
-        pattern = r"Official URL:\s*([^\n\r<]+)"
-        match = re.search(pattern, summary, re.IGNORECASE)
-        if match:
-            return match.group(1).strip()
-
-        raw = entry.get("raw")
-        if raw:
-            if "official_url" in raw:
-                return raw["official_url"]
-            if "url" in raw:
-                return raw["url"]
-            if "link" in raw and "ctftime.org/event" not in raw["link"]:
-                return raw["link"]
-
-        return "Unknown"
-
-    def build_embed(page_index: int):
-        embed = discord.Embed(title=list_title, color=color)
-
-        for entry in pages[page_index]:
-            summary = clean_summary(entry["summary"], max_length=400)
-
-            if entry.get("start_date"):
-                ts = int(entry["start_date"].timestamp())
-                date_str = f"<t:{ts}:F> (<t:{ts}:R>)"
-            elif entry.get("published"):
-                ts = int(entry["published"].timestamp())
-                date_str = f"<t:{ts}:F> (<t:{ts}:R>)"
-            else:
-                date_str = "Unknown"
-
-            weight = extract_field(summary, "Weight")
-            format_ = extract_field(summary, "Format")
-            official_url = extract_official_url(entry, summary)
-
-            if official_url != "Unknown":
-                official_url_val = f"[Visit Site]({official_url})"
-            else:
-                official_url_val = "Unknown"
-
-            field_val = (
-                f"**Date:** {date_str}\n"
-                f"**Weight:** {weight}\n"
-                f"**Format:** {format_}\n"
-                f"**Official URL:** {official_url_val}\n"
-                f"[CTFTime Link]({entry['link']})"
-            )
-
-            embed.add_field(name=entry["title"], value=field_val, inline=False)
-
-        embed.set_footer(text=f"Page {page_index+1}/{len(pages)} — {list_title}")
-        return embed
-
-    class Paginator(discord.ui.View):
-        def __init__(self):
-            super().__init__(timeout=500)
-            self.page = 0
-
-        @discord.ui.button(label="⬅️", style=discord.ButtonStyle.secondary)
-        async def previous(self, interaction_btn: discord.Interaction, button: discord.ui.Button):
-            self.page = (self.page - 1) % len(pages)
-            await interaction_btn.response.edit_message(embed=build_embed(self.page), view=self)
-
-        @discord.ui.button(label="➡️", style=discord.ButtonStyle.secondary)
-        async def next(self, interaction_btn: discord.Interaction, button: discord.ui.Button):
-            self.page = (self.page + 1) % len(pages)
-            await interaction_btn.response.edit_message(embed=build_embed(self.page), view=self)
-
-    return build_embed(0), Paginator()
+    embed = discord.Embed(title=list_title, color=color)
+
+    for entry in entries:
+        embed.add_field(name=entry.title, value=ctf_details(entry), inline=False)
+
+    embed.set_footer(text=f"Page {page_index+1}/{page_count} — {list_title}")
+    return embed
+
+def ctf_details(entry) -> str:
+    '''
+    Formats the date, weight, format and links of a CTF, as shown in CTF lists and forum threads
+
+    Args:
+        entry (CTFEntry): The event
+
+    Returns:
+        str: Markdown lines describing the event
+    '''
+
+    if entry.start_date:
+        ts = int(entry.start_date.timestamp())
+        date_str = f"<t:{ts}:F> (<t:{ts}:R>)"
+    else:
+        date_str = "Unknown"
+
+    if entry.official_url:
+        official_url_val = f"[Visit Site]({entry.official_url})"
+    else:
+        official_url_val = "Unknown"
+
+    return (
+        f"**Date:** {date_str}\n"
+        f"**Weight:** {entry.weight}\n"
+        f"**Format:** {entry.format}\n"
+        f"**Official URL:** {official_url_val}\n"
+        f"[CTFTime Link]({entry.link})"
+    )
 # ------------------ Embed Pagination End ------------------
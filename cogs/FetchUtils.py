@@ -0,0 +1,118 @@
+# Imports
+import aiohttp
+
+# ------------------ HTTP Session ------------------
+USER_AGENT = "SinisterBot/1.0 (+https://github.com/noveee/SinisterBot)"
+MAX_CONNECTIONS = 20
+MAX_CONNECTIONS_PER_HOST = 4
+DEFAULT_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10, sock_read=20)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_session = None
+
+async def get_session() -> aiohttp.ClientSession:
+    '''
+    Returns the shared HTTP session, creating it on first use
+
+    Returns:
+        aiohttp.ClientSession: Pooled keep-alive session shared by every feed fetch
+    '''
+
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=MAX_CONNECTIONS,
+            limit_per_host=MAX_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=300,
+            keepalive_timeout=60,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=DEFAULT_TIMEOUT,
+            headers={"User-Agent": USER_AGENT},
+        )
+    return _session
+
+async def close_session():
+    '''
+    Closes the shared HTTP session if one is open
+    '''
+
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+# ------------------ HTTP Session End ------------------
+
+# ------------------ Conditional Fetching ------------------
+def conditional_headers(validators: dict = None) -> dict:
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("modified"):
+            headers["If-Modified-Since"] = validators["modified"]
+    return headers
+
+async def fetch_feed(feed_url: str, validators: dict = None, timeout: float = None):
+    '''
+    Fetches the raw body of a feed, sending a conditional request when validators are known
+
+    Args:
+        feed_url (str): The RSS source to be fetched
+        validators (Optional [dict]): "etag" and "modified" values from a previous fetch
+        timeout (Optional [float]): Total timeout in seconds, overrides the session default
+
+    Returns:
+        tuple: The body (None when the server answered 304 Not Modified) and the validators to send next time
+    '''
+
+    headers = conditional_headers(validators)
+
+    # Only override the session timeout when asked, passing None would disable it
+    kwargs = {"timeout": aiohttp.ClientTimeout(total=timeout)} if timeout else {}
+    session = await get_session()
+    async with session.get(feed_url, headers=headers, **kwargs) as resp:
+        if resp.status == 304:
+            return None, validators
+
+        resp.raise_for_status()
+        body = await resp.read()
+        new_validators = {
+            "etag": resp.headers.get("ETag"),
+            "modified": resp.headers.get("Last-Modified"),
+        }
+        return body, new_validators
+
+async def stream_feed(feed_url: str, consume, validators: dict = None, timeout: float = None):
+    '''
+    Fetches a feed chunk by chunk, handing each chunk to consume until it asks to stop
+
+    The rest of the body is never downloaded once consume returns True.
+
+    Args:
+        feed_url (str): The RSS source to be fetched
+        consume (callable): Coroutine function awaited with each chunk of bytes, returns True to stop reading
+        validators (Optional [dict]): "etag" and "modified" values from a previous fetch
+        timeout (Optional [float]): Total timeout in seconds, overrides the session default
+
+    Returns:
+        tuple: False when the server answered 304 Not Modified (True otherwise) and the validators to send next time
+    '''
+
+    kwargs = {"timeout": aiohttp.ClientTimeout(total=timeout)} if timeout else {}
+    session = await get_session()
+    async with session.get(feed_url, headers=conditional_headers(validators), **kwargs) as resp:
+        if resp.status == 304:
+            return False, validators
+
+        resp.raise_for_status()
+        new_validators = {
+            "etag": resp.headers.get("ETag"),
+            "modified": resp.headers.get("Last-Modified"),
+        }
+        async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+            if await consume(chunk):
+                break
+        return True, new_validators
+# ------------------ Conditional Fetching End ------------------
@@ -0,0 +1,166 @@
+# Imports
+import hashlib
+import re
+import struct
+
+from functools import lru_cache
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+# ------------------ Canonical Links ------------------
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = frozenset(("fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src", "source", "cmpid"))
+
+def canonical_link(link: str) -> str:
+    '''
+    Normalises a link so copies of the same article from different feeds compare equal
+
+    The scheme, a leading www., the fragment, a trailing slash and tracking
+    parameters are dropped, the host is lowercased and the remaining query is sorted.
+
+    Args:
+        link (str): Link as written in the feed
+
+    Returns:
+        str: The canonical form, or None when there's no usable link
+    '''
+
+    if not link:
+        return None
+    try:
+        parts = urlsplit(link.strip())
+    except ValueError:
+        return None
+    host = (parts.hostname or "").removeprefix("www.")
+    if not host:
+        return None
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    )
+    key = host + parts.path.rstrip("/")
+    return f"{key}?{urlencode(query)}" if query else key
+# ------------------ Canonical Links End ------------------
+
+# ------------------ SimHash ------------------
+SIMHASH_BITS = 64
+# Entries this many bits or fewer apart are the same story. Rewordings of a
+# headline and lede land within about 7 bits, unrelated texts 17 or more apart
+SIMHASH_DISTANCE = 7
+# The fingerprint is split into SIMHASH_DISTANCE + 1 bands, two fingerprints
+# within SIMHASH_DISTANCE bits must agree on at least one whole band
+BAND_BITS = 8
+BAND_COUNT = SIMHASH_BITS // BAND_BITS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+# Below this many words a fingerprint says more about the wording than the story
+MIN_TOKENS = 8
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Each word's hash is spread out to one LANE_BITS wide counter per bit, so
+# adding the spread hashes of a text counts every bit position at once
+LANE_BITS = 16
+MAX_TOKENS = (1 << LANE_BITS) - 1
+LANES = struct.Struct(f"<{SIMHASH_BITS}H")
+
+# Words repeat a lot across entries, so their spread hashes are kept
+@lru_cache(maxsize=65536)
+def spread_hash(token: str) -> int:
+    digest = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+    return sum(1 << (bit * LANE_BITS) for bit in range(SIMHASH_BITS) if digest >> bit & 1)
+
+def simhash(text: str):
+    '''
+    Computes a 64 bit SimHash of a text's words
+
+    Bit i of the result is set when most words have bit i set.
+
+    Args:
+        text (str): Title and summary of an entry, only the first MAX_TOKENS words count
+
+    Returns:
+        int: Fingerprint as a signed 64 bit integer, as SQLite stores it, or None for short texts
+    '''
+
+    tokens = TOKEN_PATTERN.findall(text.lower())[:MAX_TOKENS] if text else []
+    if len(tokens) < MIN_TOKENS:
+        return None
+
+    counts = sum(map(spread_hash, tokens)).to_bytes(SIMHASH_BITS * LANE_BITS // 8, "little")
+    half = len(tokens) / 2
+    value = 0
+    for bit, count in enumerate(LANES.unpack(counts)):
+        if count > half:
+            value |= 1 << bit
+    return value - (1 << SIMHASH_BITS) if value >> (SIMHASH_BITS - 1) else value
+
+def simhash_bands(fingerprint: int):
+    '''
+    Splits a fingerprint into the BAND_BITS wide bands that are indexed for lookups
+
+    Returns:
+        tuple: BAND_COUNT band values, all None when there's no fingerprint
+    '''
+
+    if fingerprint is None:
+        return (None,) * BAND_COUNT
+    unsigned = fingerprint & ((1 << SIMHASH_BITS) - 1)
+    return tuple((unsigned >> (i * BAND_BITS)) & BAND_MASK for i in range(BAND_COUNT))
+
+def hamming_distance(a: int, b: int) -> int:
+    return ((a ^ b) & ((1 << SIMHASH_BITS) - 1)).bit_count()
+# ------------------ SimHash End ------------------
+
+# ------------------ Story Text ------------------
+# Only the opening words of a summary are fingerprinted. Shows on the same
+# network share long sponsor and social footers that would outweigh the story
+LEAD_TOKENS = 48
+# A line starting with a rule or a sponsor/subscribe call ends the story part of a summary
+FOOTER_PATTERN = re.compile(
+    r"^\W*(?:[=\-_*~]{3,}|sponsor|brought to you by|follow us|subscribe)", re.IGNORECASE | re.MULTILINE
+)
+
+# Copies of a story share at least this share of the shorter title's words
+TITLE_OVERLAP = 0.5
+TITLE_STOPWORDS = frozenset((
+    "a", "an", "and", "at", "by", "ep", "episode", "for", "from", "how", "in", "is", "new",
+    "of", "on", "or", "part", "the", "to", "what", "why", "with",
+))
+
+def story_text(title: str, summary_text: str) -> str:
+    '''
+    Picks the words of an entry that identify its story
+
+    Args:
+        title (str): Title of the entry
+        summary_text (str): Stored summary text, or None
+
+    Returns:
+        str: The title followed by the first LEAD_TOKENS words of the summary before any footer
+    '''
+
+    lead = ""
+    if summary_text:
+        footer = FOOTER_PATTERN.search(summary_text)
+        if footer:
+            summary_text = summary_text[:footer.start()]
+        lead = " ".join(TOKEN_PATTERN.findall(summary_text.lower())[:LEAD_TOKENS])
+    return f"{title or ''} {lead}"
+
+def title_words(title: str) -> set:
+    words = TOKEN_PATTERN.findall((title or "").lower())
+    return {word for word in words if word not in TITLE_STOPWORDS and not word.isdigit()}
+
+def similar_titles(a: str, b: str) -> bool:
+    '''
+    Checks that two titles could name the same story, so a SimHash match isn't down to shared boilerplate
+
+    Returns:
+        bool: True when enough words are shared, or when either title has no words to compare
+    '''
+
+    a_words, b_words = title_words(a), title_words(b)
+    if not a_words or not b_words:
+        return True
+    return len(a_words & b_words) >= TITLE_OVERLAP * min(len(a_words), len(b_words))
+# ------------------ Story Text End ------------------
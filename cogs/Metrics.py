@@ -0,0 +1,194 @@
+# Imports
+import re
+import time
+
+from collections import deque
+from discord import app_commands
+
+# ------------------ Rolling Histograms ------------------
+# Samples kept per timer, percentiles are over the most recent ones
+HISTOGRAM_WINDOW = 1024
+QUANTILES = (0.5, 0.95, 0.99)
+
+class RollingHistogram:
+    '''
+    Latency samples over a sliding window, plus lifetime count and sum
+    '''
+
+    def __init__(self, window: int = HISTOGRAM_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def quantiles(self, qs=QUANTILES):
+        '''
+        Nearest-rank quantiles of the current window
+
+        Args:
+            qs (Optional [tuple]): Quantiles between 0 and 1
+
+        Returns:
+            list: One value per quantile, 0.0 while the window is empty
+        '''
+
+        if not self.samples:
+            return [0.0 for _ in qs]
+        ordered = sorted(self.samples)
+        return [ordered[min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.5) - 1))] for q in qs]
+# ------------------ Rolling Histograms End ------------------
+
+# ------------------ Metrics Registry ------------------
+class Timer:
+    '''
+    Context manager recording how long its block took, usable in sync and async code
+    '''
+
+    __slots__ = ("registry", "name", "labels", "started")
+
+    def __init__(self, registry, name: str, labels: dict):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        if exc_type is not None:
+            self.registry.incr(f"{self.name}_errors", **self.labels)
+        return False
+
+class Metrics:
+    '''
+    In-process timers and counters for the hot paths
+
+    Timers and counters are keyed by name plus optional labels, e.g.
+    observe("command", 0.2, command="ctfs").
+    '''
+
+    def __init__(self):
+        self.timers = {}    # (name, labels) -> RollingHistogram
+        self.counters = {}  # (name, labels) -> int
+        self.started = time.time()
+
+    @staticmethod
+    def _key(name: str, labels: dict):
+        return name, tuple(sorted(labels.items()))
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = self._key(name, labels)
+        histogram = self.timers.get(key)
+        if histogram is None:
+            histogram = self.timers[key] = RollingHistogram()
+        histogram.observe(seconds)
+
+    def incr(self, name: str, amount: int = 1, **labels):
+        key = self._key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def timer(self, name: str, **labels):
+        '''
+        Times a block, e.g. with metrics.timer("feed_parse"): ...
+
+        Args:
+            name (str): Timer name
+            **labels: Extra labels for the sample
+
+        Returns:
+            Timer: Context manager recording the block's duration
+        '''
+
+        return Timer(self, name, labels)
+
+metrics = Metrics()
+# ------------------ Metrics Registry End ------------------
+
+# ------------------ Exposition ------------------
+PROMETHEUS_PREFIX = "sinbot_"
+METRIC_NAME_PATTERN = re.compile(r"[^a-zA-Z0-9_]")
+
+def label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+def render_prometheus(registry: Metrics) -> str:
+    '''
+    Renders the registry in the Prometheus text exposition format
+
+    Timers become summaries in seconds and counters become _total counters.
+
+    Args:
+        registry (Metrics): Registry to render
+
+    Returns:
+        str: The exposition text
+    '''
+
+    lines = []
+    typed = set()
+    for (name, labels), histogram in sorted(registry.timers.items()):
+        metric = PROMETHEUS_PREFIX + METRIC_NAME_PATTERN.sub("_", name) + "_seconds"
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} summary")
+        for q, value in zip(QUANTILES, histogram.quantiles()):
+            lines.append(f"{metric}{label_text(labels, [('quantile', q)])} {value:.6f}")
+        lines.append(f"{metric}_sum{label_text(labels)} {histogram.total:.6f}")
+        lines.append(f"{metric}_count{label_text(labels)} {histogram.count}")
+
+    for (name, labels), value in sorted(registry.counters.items()):
+        metric = PROMETHEUS_PREFIX + METRIC_NAME_PATTERN.sub("_", name) + "_total"
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{label_text(labels)} {value}")
+
+    uptime = PROMETHEUS_PREFIX + "uptime_seconds"
+    lines.append(f"# TYPE {uptime} gauge")
+    lines.append(f"{uptime} {time.time() - registry.started:.0f}")
+    return "\n".join(lines) + "\n"
+# ------------------ Exposition End ------------------
+
+# ------------------ Command Timing ------------------
+def record_command(interaction, command, failed: bool = False):
+    '''
+    Records how long a slash command took, from the tree picking it up to its handler returning
+
+    Args:
+        interaction (discord.Interaction): The command interaction, stamped by InstrumentedTree
+        command (app_commands.Command): The command that ran
+        failed (Optional [bool]): True if the handler raised
+    '''
+
+    started = interaction.extras.get("started")
+    name = command.qualified_name if command else "unknown"
+    if started is not None:
+        metrics.observe("command", time.perf_counter() - started, command=name)
+    metrics.incr("command_errors" if failed else "commands", command=name)
+
+class InstrumentedTree(app_commands.CommandTree):
+    '''
+    Command tree stamping every interaction so its handler can be timed
+
+    Completion is recorded by the Stats cog from on_app_command_completion,
+    failures are recorded here.
+    '''
+
+    async def interaction_check(self, interaction) -> bool:
+        interaction.extras["started"] = time.perf_counter()
+        return True
+
+    async def on_error(self, interaction, error):
+        record_command(interaction, interaction.command, failed=True)
+        await super().on_error(interaction, error)
+# ------------------ Command Timing End ------------------
@@ -0,0 +1,42 @@
+# Imports
+from dataclasses import dataclass
+from datetime import datetime
+
+# ------------------ Entry Models ------------------
+# Slotted and frozen so cached feeds and open paginators only hold the fields below,
+# never the feedparser entry they were built from
+
+@dataclass(frozen=True, slots=True)
+class FeedEntry:
+    '''
+    A single RSS/Atom entry
+
+    summary_text is the cleaned summary stored at ingest, entries read back
+    from the DB carry it instead of the raw summary. feed and cursor are only
+    set on entries read back for the /news timeline.
+    '''
+
+    title: str
+    link: str
+    summary: str
+    published: datetime = None
+    audio: str = None
+    guid: str = None
+    summary_text: str = None
+    feed: str = None
+    cursor: tuple = None
+
+@dataclass(frozen=True, slots=True)
+class CTFEntry:
+    '''
+    A single CTFtime event, with the fields the embeds need pulled out of its summary
+    '''
+
+    title: str
+    link: str
+    summary: str
+    start_date: datetime = None
+    weight: str = "Unknown"
+    format: str = "Unknown"
+    official_url: str = None
+# ------------------ Entry Models End ------------------
@@ -0,0 +1,238 @@
+# Imports
+import json
+import sqlite3
+import time
+import discord
+
+from dataclasses import replace
+from datetime import datetime, timezone
+from .CTFStore import ctf_events_between, count_ctf_events_between
+from .FeedStore import search_entries, count_search_matches, recent_entries, count_recent_entries, news_page
+from .FeedUtils import build_entry_embed, build_ctf_page_embed
+from .Storage import db
+
+# ------------------ Pager Store ------------------
+# A pager is the query behind one paginated message. Its id and the page
+# go in the button custom_ids, so any button on any message can rebuild
+# its page from the DB, even after a restart.
+PAGER_RETENTION_DAYS = 90
+SEARCH_LIMIT = 100
+CTF_PER_PAGE = 3
+
+def create_pager(conn: sqlite3.Connection, kind: str, params: dict) -> int:
+    '''
+    Saves the query behind a paginated message
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        kind (str): One of PAGER_KINDS or "news"
+        params (dict): JSON serialisable query and display parameters
+
+    Returns:
+        int: The pager id used in custom_ids
+    '''
+
+    cur = conn.execute(
+        "INSERT INTO pagers (kind, params, created_at) VALUES (?, ?, ?)",
+        (kind, json.dumps(params, separators=(",", ":")), int(time.time())),
+    )
+    return cur.lastrowid
+
+def get_pager(conn: sqlite3.Connection, pager_id: int):
+    row = conn.execute("SELECT kind, params FROM pagers WHERE id = ?", (pager_id,)).fetchone()
+    return (row[0], json.loads(row[1])) if row else None
+
+def purge_pagers(conn: sqlite3.Connection, now: int = None) -> int:
+    '''
+    Forgets pagers older than PAGER_RETENTION_DAYS, their buttons then report the list as expired
+
+    Returns:
+        int: Number of deleted pagers
+    '''
+
+    now = int(time.time()) if now is None else now
+    return conn.execute(
+        "DELETE FROM pagers WHERE created_at < ?", (now - PAGER_RETENTION_DAYS * 86400,)
+    ).rowcount
+# ------------------ Pager Store End ------------------
+
+# ------------------ Page Loading ------------------
+def window(params):
+    return (
+        datetime.fromtimestamp(params["start"], timezone.utc),
+        datetime.fromtimestamp(params["end"], timezone.utc),
+    )
+
+# kind -> (per page, count(conn, params), fetch(conn, params, offset, limit))
+PAGER_KINDS = {
+    "ctf": (
+        CTF_PER_PAGE,
+        lambda conn, p: count_ctf_events_between(conn, *window(p)),
+        lambda conn, p, offset, limit: ctf_events_between(conn, *window(p), offset, limit),
+    ),
+    "search": (
+        1,
+        lambda conn, p: count_search_matches(conn, p["query"], p.get("feed_url"), SEARCH_LIMIT),
+        lambda conn, p, offset, limit: search_entries(conn, p["query"], p.get("feed_url"), limit, offset),
+    ),
+    "recent": (
+        1,
+        lambda conn, p: count_recent_entries(conn, p["feed_url"], p["since"]),
+        lambda conn, p, offset, limit: recent_entries(conn, p["feed_url"], p["since"], offset, limit),
+    ),
+}
+
+def read_page(conn: sqlite3.Connection, kind: str, params: dict, page: int):
+    '''
+    Reads one page of an offset paged list, wrapping around at either end
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+        kind (str): Key of PAGER_KINDS
+        params (dict): Parameters saved with the pager
+        page (int): Requested page, may be -1 or one past the end
+
+    Returns:
+        tuple: (items, page, page_count, total), items is empty when the list is
+    '''
+
+    per_page, count, fetch = PAGER_KINDS[kind]
+    total = count(conn, params)
+    if not total:
+        return [], 0, 0, 0
+    page_count = -(-total // per_page)
+    page %= page_count
+    return fetch(conn, params, page * per_page, per_page), page, page_count, total
+
+def read_news(conn: sqlite3.Connection, cursor, older: bool):
+    '''
+    Reads the /news entry next to the cursor plus one more, to know whether the list goes on
+
+    Returns:
+        tuple: (entry, more) where entry is None when there's nothing past the cursor
+    '''
+
+    page = news_page(conn, cursor, older, 2)
+    if not page:
+        return None, False
+    # Newer pages come back newest first, the entry next to the cursor is the last one
+    return (page[0] if older else page[-1]), len(page) == 2
+# ------------------ Page Loading End ------------------
+
+# ------------------ Persistent Buttons ------------------
+class PageButton(discord.ui.DynamicItem[discord.ui.Button], template=r"pg:(?P<pager>\d+):(?P<page>-?\d+):(?P<dir>[pn])(?::(?P<published>-?\d+):(?P<id>\d+))?"):
+    '''
+    Previous/next button carrying its target page in its custom_id
+
+    Registered once with bot.add_dynamic_items, so no view object is kept
+    per message and buttons keep working across restarts.
+    '''
+
+    def __init__(self, pager_id: int, page: int, direction: str, cursor: tuple = None, disabled: bool = False):
+        custom_id = f"pg:{pager_id}:{page}:{direction}"
+        if cursor:
+            custom_id += f":{cursor[0]}:{cursor[1]}"
+        super().__init__(discord.ui.Button(
+            label="⬅️" if direction == "p" else "➡️",
+            style=discord.ButtonStyle.secondary,
+            custom_id=custom_id,
+            disabled=disabled,
+        ))
+        self.pager_id = pager_id
+        self.page = page
+        self.direction = direction
+        self.cursor = cursor
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        cursor = (int(match["published"]), int(match["id"])) if match["published"] else None
+        return cls(int(match["pager"]), int(match["page"]), match["dir"], cursor)
+
+    async def callback(self, interaction: discord.Interaction):
+        pager = await db.read(get_pager, self.pager_id)
+        if pager is None:
+            await interaction.response.send_message("This list has expired, run the command again.", ephemeral=True)
+            return
+
+        kind, params = pager
+        if kind == "news":
+            embed, view = await render_news(self.pager_id, params, self.page, self.cursor, older=self.direction == "n")
+        else:
+            embed, view = await render_page(self.pager_id, kind, params, self.page)
+
+        if embed is None:
+            await interaction.response.send_message("Nothing left in this list.", ephemeral=True)
+            return
+        await interaction.response.edit_message(embed=embed, view=view)
+
+def pager_view(pager_id: int, page: int, cursor: tuple = None, first: bool = False, last: bool = False):
+    view = discord.ui.View(timeout=None)
+    view.add_item(PageButton(pager_id, page - 1, "p", cursor, disabled=first))
+    view.add_item(PageButton(pager_id, page + 1, "n", cursor, disabled=last))
+    return view
+# ------------------ Persistent Buttons End ------------------
+
+# ------------------ Page Rendering ------------------
+def build_page_embed(kind: str, params: dict, items, page: int, page_count: int, total: int):
+    color = discord.Color(params["color"])
+    if kind == "ctf":
+        return build_ctf_page_embed(items, params["title"], color, page, page_count)
+    footer = f"Result {page+1}/{total} — {params['title']}"
+    return build_entry_embed(items[0], color, params.get("link_label", "Read/Listen"), footer)
+
+async def render_page(pager_id: int, kind: str, params: dict, page: int):
+    items, page, page_count, total = await db.read(read_page, kind, params, page)
+    if not items:
+        return None, None
+    return build_page_embed(kind, params, items, page, page_count, total), pager_view(pager_id, page)
+
+def build_news_embed(params: dict, entry, page: int):
+    title = f"[{entry.feed}] {entry.title}" if entry.feed else entry.title
+    return build_entry_embed(
+        replace(entry, title=title), discord.Color(params["color"]), params.get("link_label", "Read/Listen"),
+        f"Result {page+1} — {params['title']}",
+    )
+
+async def render_news(pager_id: int, params: dict, page: int, cursor, older: bool):
+    entry, more = await db.read(read_news, cursor, older)
+    if entry is None:
+        # The entry behind the cursor is gone, start over from the newest
+        page = 0
+        entry, more = await db.read(read_news, None, True)
+        if entry is None:
+            return None, None
+        older = True
+
+    first = page <= 0 or (not older and not more)
+    last = older and not more
+    return build_news_embed(params, entry, page), pager_view(pager_id, page, entry.cursor, first=first, last=last)
+
+async def open_pager(kind: str, params: dict):
+    '''
+    Builds the first page of a paginated list and saves its query for the buttons
+
+    Args:
+        kind (str): "ctf", "search", "recent" or "news"
+        params (dict): Query parameters plus title, color (int) and link_label
+
+    Returns:
+        tuple: The first embed and its view, or (None, None) when the list is empty
+    '''
+
+    if kind == "news":
+        entry, more = await db.read(read_news, None, True)
+        if entry is None:
+            return None, None
+        pager_id = await db.write(create_pager, kind, params)
+        return build_news_embed(params, entry, 0), pager_view(pager_id, 0, entry.cursor, first=True, last=not more)
+
+    items, page, page_count, total = await db.read(read_page, kind, params, 0)
+    if not items:
+        return None, None
+    pager_id = await db.write(create_pager, kind, params)
+    return build_page_embed(kind, params, items, page, page_count, total), pager_view(pager_id, page)
+# ------------------ Page Rendering End ------------------
+
+# Discord Setup
+async def setup(bot):
+    bot.add_dynamic_items(PageButton)
@@ -0,0 +1,130 @@
+# Imports
+import asyncio
+import heapq
+import random
+import statistics
+import time
+
+# ------------------ Poll Intervals ------------------
+MIN_POLL_INTERVAL = 10 * 60
+MAX_POLL_INTERVAL = 6 * 60 * 60
+DEFAULT_POLL_INTERVAL = 60 * 60
+
+# Publication times looked at per feed, and how many are needed before trusting them
+HISTORY_SIZE = 20
+MIN_HISTORY = 3
+
+# The window opens this fraction of a typical gap before the next entry is due,
+# inside it a feed is polled every POLL_FRACTION of a gap
+EARLY_WINDOW = 0.15
+POLL_FRACTION = 1 / 48
+JITTER = 0.1
+# MIN_POLL_INTERVAL * 2 ** 6 is already past MAX_POLL_INTERVAL, more failures change nothing
+MAX_BACKOFF_EXPONENT = 6
+
+def poll_interval(history, now: float, failures: int = 0, rng=random):
+    '''
+    Works out how long to wait before polling a feed again
+
+    The typical gap between entries is the median of the recent gaps. Until
+    the next entry is nearly due the feed is left alone, then it's polled
+    often, backing off the longer it stays quiet past that point.
+
+    Args:
+        history (list): Recent published epochs of the feed, oldest first
+        now (float): Current epoch
+        failures (Optional [int]): Consecutive failed polls of the feed
+        rng (Optional): Source of jitter, random by default
+
+    Returns:
+        float: Seconds until the next poll
+    '''
+
+    gaps = [b - a for a, b in zip(history, history[1:]) if b > a]
+    if failures:
+        delay = MIN_POLL_INTERVAL * 2 ** min(failures, MAX_BACKOFF_EXPONENT)
+    elif len(history) < MIN_HISTORY or not gaps:
+        delay = DEFAULT_POLL_INTERVAL
+    else:
+        typical = statistics.median(gaps)
+        window_start = history[-1] + typical * (1 - EARLY_WINDOW)
+        if now < window_start:
+            delay = window_start - now
+        else:
+            delay = max(typical * POLL_FRACTION, (now - window_start) / 4)
+
+    # Jitter keeps feeds on the same host from lining up
+    delay *= rng.uniform(1 - JITTER, 1 + JITTER)
+    return min(MAX_POLL_INTERVAL, max(MIN_POLL_INTERVAL, delay))
+# ------------------ Poll Intervals End ------------------
+
+# ------------------ Poll Scheduler ------------------
+class PollScheduler:
+    '''
+    Priority queue of feeds keyed by their next poll time
+
+    Rescheduling a feed pushes a new heap entry and the old one is skipped
+    when it surfaces, so nothing has to be searched for or removed. Keys only
+    need to be hashable and comparable, the reminder scheduler keys it by CTF name.
+    '''
+
+    def __init__(self):
+        self._heap = []  # (when, feed_id)
+        self._due = {}   # feed_id -> current poll time
+        self._wake = asyncio.Event()
+
+    def __len__(self):
+        return len(self._due)
+
+    def __contains__(self, feed_id):
+        return feed_id in self._due
+
+    def schedule(self, feed_id, when: float):
+        '''
+        Sets the next poll time of a feed, replacing any earlier one
+
+        Args:
+            feed_id (int): Feed to poll
+            when (float): Epoch of the poll
+        '''
+
+        self._due[feed_id] = when
+        heapq.heappush(self._heap, (when, feed_id))
+        self._wake.set()
+
+    def remove(self, feed_id):
+        self._due.pop(feed_id, None)
+
+    def next_poll(self, feed_id):
+        return self._due.get(feed_id)
+
+    async def wait_due(self):
+        '''
+        Waits for the next feeds to come due and takes them off the queue
+
+        Returns:
+            list: IDs of every feed due now
+        '''
+
+        while True:
+            # Drop entries superseded by a later schedule() or remove()
+            while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+
+            now = time.time()
+            if self._heap and self._heap[0][0] <= now:
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    when, feed_id = heapq.heappop(self._heap)
+                    if self._due.get(feed_id) == when:
+                        del self._due[feed_id]
+                        due.append(feed_id)
+                return due
+
+            self._wake.clear()
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+# ------------------ Poll Scheduler End ------------------
@@ -2,282 +2,480 @@
 import discord
 import asyncio
 import sqlite3
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
 from discord.ext import commands
 from discord import app_commands
-from datetime import datetime, timezone, timedelta
-from dateutil import parser as dateparser
 
 # Token
 from BotOfSin import GUILD_ID, CHANNEL_ID
-from .FeedUtils import parse_feed, filter_recent, make_paginated_view, clean_summary, clean_ctbb_summary
+from .Announcer import Announcer
+from .FeedStore import (
+    seed_feeds, add_feed, remove_feed, find_feed, list_feeds, ingest_entries, backfill_summary_text,
+    backfill_fingerprints, purge_expired, search_entries, publish_history,
+)
+from .Paginators import open_pager, purge_pagers
+from .PollScheduler import PollScheduler, poll_interval, HISTORY_SIZE, DEFAULT_POLL_INTERVAL
+from .Storage import db
+from .Metrics import metrics
+from .FeedStream import parse_feed_since
+from .SummaryText import summary_to_text, SUMMARY_STYLES
 
 # Feeds
 PORTSWIGGER_FEED = "https://portswigger.net/research/rss"
 CYBERWIRE_FEED = "https://feeds.megaphone.fm/cyberwire-daily-podcast"
 CTBB_FEED = "https://media.rss.com/ctbbpodcast/feed.xml"
 
+# Feed loop fan-out limits
+FETCH_WORKERS = 8
+FETCH_PER_HOST = 2
+
+# Expired entries are purged at most this often, however often feeds are polled
+PURGE_INTERVAL = 60 * 60
+
+# /feed list stops before the embed description limit
+FEED_LIST_LIMIT = 4000
+
+# Registered on startup so the feed loop ingests them, with the summary style from SummaryText
+DEFAULT_FEEDS = [
+    ("PortSwigger Research", PORTSWIGGER_FEED, None),
+    ("CyberWire Daily", CYBERWIRE_FEED, None),
+    ("CTBB Podcast", CTBB_FEED, "ctbb"),
+]
+
 class NewsCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self._bg_task = None
+        self.validators = {}  # feed url -> validators of the last incremental read
+        self.announcer = Announcer(bot, CHANNEL_ID)
+        self.scheduler = PollScheduler()
+        self.failures = {}  # feed_id -> consecutive failed polls
+        self.feed_names = {}  # feed_id -> name, for autocomplete
+        self._last_purge = 0
 
     async def cog_load(self):
+        await db.start()
+        await db.write(seed_feeds, DEFAULT_FEEDS)
+        await db.write(backfill_summary_text)
+        await db.write(backfill_fingerprints)
+        self.feed_names = dict(await db.fetchall("SELECT id, name FROM feeds"))
+
+        # Drains whatever was left unposted before the restart, then waits for new entries
+        self.announcer.start()
         self._bg_task = asyncio.create_task(self.feed_loop())
 
     async def cog_unload(self):
         if self._bg_task:
             self._bg_task.cancel()
+        self.announcer.stop()
      
     # ------------------ Feed DB Setup ------------------
     async def feed_loop(self):
         await self.bot.wait_until_ready()
+        now = time.time()
+        for (feed_id,) in await db.fetchall("SELECT id FROM feeds"):
+            self.scheduler.schedule(feed_id, now)
+
+        # Each feed is polled on its own schedule, whatever is due at the same time goes out together
         while not self.bot.is_closed():
+            due = await self.scheduler.wait_due()
             try:
-                await self.check_feeds()
+                with metrics.timer("feed_cycle"):
+                    await self.check_feeds(due)
             except Exception as e:
                 print(f"[feed_loop] unexpected error: {e}")
-            await asyncio.sleep(60 * 60)
+                for feed_id in due:
+                    if feed_id not in self.scheduler:
+                        self.scheduler.schedule(feed_id, time.time() + DEFAULT_POLL_INTERVAL)
 
-    async def check_feeds(self):
+    async def fetch_feeds(self, feeds):
+        '''
+        Reads the entries added to the given feeds since their high-water marks, concurrently
+        
+        Args:
+            feeds (list): (id, name, url, last_guid, last_published) rows from the feeds table
+        
+        Returns:
+            tuple: (id, name, entries) for each feed, entries is None when the fetch failed,
+                and the new validators by feed url, to keep once the entries are stored
+        '''
+        
+        validators = {}
+        workers = asyncio.Semaphore(FETCH_WORKERS)
+        hosts = defaultdict(lambda: asyncio.Semaphore(FETCH_PER_HOST))
+
+        async def fetch_one(feed_id, name, url, last_guid, last_published):
+            # Wait on the host limit first so a busy host doesn't hold worker slots
+            async with hosts[urlsplit(url).hostname]:
+                async with workers:
+                    try:
+                        entries, validators[url] = await parse_feed_since(
+                            url, (last_guid, last_published), include_audio=True, validators=self.validators.get(url)
+                        )
+                        return feed_id, name, entries
+                    except Exception as e:
+                        print(f"[check_feeds] parse_feed_since failed for {name} ({url}): {e}")
+                        return feed_id, name, None
+
+        return await asyncio.gather(*(fetch_one(*feed) for feed in feeds)), validators
+
+    async def check_feeds(self, feed_ids):
+        '''
+        Polls the given feeds, ingests what's new and schedules each feed's next poll
+        
+        Args:
+            feed_ids (list): IDs of the feeds that are due
+        '''
         
         # Error Handling
+        placeholders = ",".join("?" * len(feed_ids))
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
+            feeds = await db.fetchall(
+                f"SELECT id, name, url, last_guid, last_published FROM feeds WHERE id IN ({placeholders})", feed_ids
+            )
         except Exception as e:
-            print(f"[check_feeds] DB connect error: {e}")
+            print(f"[check_feeds] DB fetch feeds error: {e}")
+            raise
+        
+        # Read what's new in every feed concurrently, then ingest the whole cycle in one transaction
+        results, validators = await self.fetch_feeds(feeds)
+        # A feed without a high-water mark hasn't been read yet, only what it publishes after this read is announced
+        backlog = {feed_id for feed_id, _, _, last_guid, last_published in feeds if last_guid is None and last_published is None}
+        try:
+            new_entries = await db.write(
+                ingest_entries, [(feed_id, entries) for feed_id, _, entries in results if entries], True, backlog
+            )
+            # Kept only once the entries are stored, otherwise the next poll's 304 would skip them
+            self.validators.update(validators)
+        except Exception as exc:
+            print(f"[check_feeds] DB ingest failed: {exc}")
+            new_entries = []
+
+        # New rows are stored unposted, the announcer picks them up from there
+        if new_entries:
+            self.announcer.wake()
+
+        # Learn each feed's next poll time from its publication history, backing off feeds that failed
+        for feed_id, _, entries in results:
+            if entries is None:
+                self.failures[feed_id] = self.failures.get(feed_id, 0) + 1
+            else:
+                self.failures.pop(feed_id, None)
+        try:
+            history = await db.read(publish_history, [feed_id for feed_id, _, _ in results], HISTORY_SIZE)
+        except Exception as exc:
+            print(f"[check_feeds] DB history error: {exc}")
+            history = {}
+        now = time.time()
+        for feed_id, _, _ in results:
+            delay = poll_interval(history.get(feed_id, []), now, self.failures.get(feed_id, 0))
+            self.scheduler.schedule(feed_id, now + delay)
+
+        # Purge entries older than each feed's retention window
+        if now - self._last_purge >= PURGE_INTERVAL:
+            self._last_purge = now
+            try:
+                await db.write(purge_expired)
+                await db.write(purge_pagers)
+            except Exception as exc:
+                print(f"[check_feeds] purge error: {exc}")
+    # ------------------ Feed DB Setup End ------------------
+
+    # ------------------ Search ------------------
+    async def search_source(self, interaction, feed_url, query, list_title, noun, color, link_label, link_field):
+        '''
+        Shared handler for the *search commands, answered from the ingested entries
+        
+        Args:
+            interaction (discord.Interaction): The command interaction
+            feed_url (str): Source to search, matched against the feeds table
+            query (str): Search text, supports "phrases" and prefix* terms
+            list_title (str): Title used for the paginator
+            noun (str): What the source calls its entries, used in the no results message
+            color (discord.Color): Color used for the embeds
+            link_label (str): Label for the link in the paginator
+            link_field (str): Label for the link on a single result
+        '''
+        
+        await interaction.response.defer()
+        # Two rows are enough to tell a single hit from a list
+        try:
+            matches = await db.read(search_entries, query, feed_url, 2)
+        except sqlite3.OperationalError as e:
+            print(f"[search_source] bad query {query!r}: {e}")
+            matches = []
+
+        if not matches:
+            await interaction.followup.send(f"No {noun} found matching: {query}")
+            return
+
+        if len(matches) > 1:
+            params = {"query": query, "feed_url": feed_url, "title": list_title, "color": color.value, "link_label": link_label}
+            embed, view = await open_pager("search", params)
+            await interaction.followup.send(embed=embed, view=view)
+            return
+
+        entry = matches[0]
+        ts = int(entry.published.timestamp()) if entry.published else None
+        published_str = f"<t:{ts}:F> (<t:{ts}:R>)" if ts else "Unknown"
+        embed = discord.Embed(title=entry.title, url=entry.link, description=entry.summary_text or summary_to_text(entry.summary), color=color)
+        embed.add_field(name="Published", value=published_str, inline=False)
+        embed.add_field(name=link_field, value=entry.audio or entry.link, inline=False)
+        await interaction.followup.send(embed=embed)
+
+    async def send_recent(self, interaction, feed_url, days, list_title, color, link_label, empty):
+        '''
+        Shared handler for the list commands, pages through a source's ingested entries from the last few days
+        
+        Args:
+            interaction (discord.Interaction): The command interaction
+            feed_url (str): Source to list, matched against the feeds table
+            days (int): How many days back to list, None for everything stored
+            list_title (str): Title used for the paginator
+            color (discord.Color): Color used for the embeds
+            link_label (str): Label for the link in the paginator
+            empty (str): Message sent when nothing was published in the window
+        '''
+        
+        await interaction.response.defer()
+        params = {
+            "feed_url": feed_url,
+            "since": int(time.time()) - days * 86400 if days else 0,
+            "title": list_title,
+            "color": color.value,
+            "link_label": link_label,
+        }
+        embed, view = await open_pager("recent", params)
+        if embed is None:
+            await interaction.followup.send(empty)
+            return
+        await interaction.followup.send(embed=embed, view=view)
+    # ------------------ Search End ------------------
+
+    # ------------------ Feed Registry Commands ------------------
+    feed = app_commands.Group(
+        name="feed", description="Manage the news feeds", default_permissions=discord.Permissions(administrator=True)
+    )
+
+    async def feed_autocomplete(self, interaction: discord.Interaction, current: str):
+        with metrics.timer("autocomplete", command="feed"):
+            current = current.lower()
+            names = sorted(self.feed_names.items(), key=lambda item: item[1].lower())
+            return [
+                app_commands.Choice(name=name[:100], value=str(feed_id))
+                for feed_id, name in names
+                if current in name.lower()
+            ][:25]
+
+    async def resolve_feed(self, interaction: discord.Interaction, feed: str):
+        # Feed options autocomplete to ids, but a typed name or URL works too
+        row = await db.read(find_feed, feed)
+        if row is None:
+            await interaction.response.send_message(f"No feed named {feed}, see /feed list.", ephemeral=True)
+        return row
+
+    # /feed add - validates a feed with one fetch and registers it
+    @feed.command(name="add", description="Register a news feed")
+    @app_commands.describe(
+        url="RSS or Atom feed URL", name="Name shown in announcements", style="Summary cleanup style",
+        retention_days="Delete entries older than this many days, kept for good when left out",
+    )
+    @app_commands.choices(style=[app_commands.Choice(name=style, value=style) for style in SUMMARY_STYLES])
+    async def feed_add(
+        self, interaction: discord.Interaction, url: str, name: str, style: app_commands.Choice[str] = None,
+        retention_days: app_commands.Range[int, 1, 3650] = None,
+    ):
+        await interaction.response.defer(ephemeral=True)
+        url = url.strip()
+        name = name.strip()
+        if urlsplit(url).scheme not in ("http", "https"):
+            await interaction.followup.send("Feed URLs must start with http:// or https://")
+            return
+        if await db.read(find_feed, url) or await db.read(find_feed, name):
+            await interaction.followup.send("A feed with that name or URL is already registered.")
             return
 
         try:
-            cur.execute("SELECT id, name, url FROM feeds")
-            feeds = cur.fetchall()
+            entries, validators = await parse_feed_since(url, include_audio=True)
         except Exception as e:
-            print(f"[check_feeds] DB fetch feeds error: {e}")
-            conn.close()
+            await interaction.followup.send(f"Couldn't read {url}: {e}")
+            return
+        if not entries:
+            await interaction.followup.send(f"No entries found at {url}, is it an RSS or Atom feed?")
             return
-        
-        # Beginning of feed checking
-        for feed_id, name, url in feeds:
-            try:
-                entries = parse_feed(url, include_audio=True)
-            except Exception as e:
-                print(f"[check_feeds] parse_feed failed for {name} ({url}): {e}")
-                continue
-
-            for e in entries:
-                # Creating stable GUID and using entry raw id if present
-                guid = None
-                raw = e.get("raw")
-                try:
-                    if isinstance(raw, dict):
-                        guid = raw.get("id") or raw.get("guid") or e.get("link")
-                    else:
-                        guid = raw.get("id") if hasattr(raw, "get") else e.get("link")
-                except Exception:
-                    guid = e.get("link")
-
-                # Avoiding duplicate entries
-                try:
-                    cur.execute("SELECT 1 FROM entries WHERE guid = ?", (guid,))
-                    if cur.fetchone():
-                        continue
-                except Exception as exc:
-                    print(f"[check_feeds] DB select error for guid {guid}: {exc}")
-                    continue
-
-                # Preparing published db
-                published_val = None
-                if e.get("published"):
-                    try:
-                        published_val = e["published"].isoformat()
-                    except Exception:
-                        published_val = None
-
-                # Adding new entry
-                try:
-                    cur.execute(
-                        """INSERT INTO entries
-                        (feed_id, guid, title, link, summary, published, audio, posted)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, 0)""",
-                        (
-                            feed_id,
-                            guid,
-                            e.get("title"),
-                            e.get("link"),
-                            e.get("summary"),
-                            published_val,
-                            e.get("audio"),
-                        ),
-                    )
-                    conn.commit()
-                except Exception as exc:
-                    print(f"[check_feeds] DB insert failed for guid {guid}: {exc}")
-                    continue
-
-                chan_id = int(CHANNEL_ID) if not isinstance(CHANNEL_ID, int) else CHANNEL_ID
-                channel = self.bot.get_channel(chan_id)
-                if channel is None:
-                    try:
-                        channel = await self.bot.fetch_channel(chan_id)
-                    except Exception as exc:
-                        print(f"[check_feeds] couldn't fetch channel {chan_id}: {exc}")
 
-                if channel:
-                    try:
-                        await channel.send(f"**{name}** just released: {e.get('title')} {e.get('link')}")
-                        cur.execute("UPDATE entries SET posted = 1 WHERE guid = ?", (guid,))
-                        conn.commit()
-                    except Exception as exc:
-                        print(f"[check_feeds] failed sending or updating posted for guid {guid}: {exc}")
+        style = style.value if style and style.value != "default" else None
+        feed_id = await db.write(add_feed, name, url, style, retention_days)
+        if feed_id is None:
+            await interaction.followup.send("A feed with that name or URL is already registered.")
+            return
 
-        # Purge entries older than 90 days
+        # The backlog is stored for /latest and /search, only entries published from now on are announced
         try:
-            cutoff = datetime.now(timezone.utc) - timedelta(days=90)
-            cur.execute("SELECT guid, published FROM entries WHERE published IS NOT NULL")
-            rows = cur.fetchall()
-            for guid, published_str in rows:
-                try:
-                    pub_dt = dateparser.parse(published_str).astimezone(timezone.utc)
-                    if pub_dt < cutoff:
-                        cur.execute("DELETE FROM entries WHERE guid = ?", (guid,))
-                except Exception:
-                    # Skip malformed dates
-                    continue
-            conn.commit()
-        except Exception as exc:
-            print(f"[check_feeds] purge error: {exc}")
-        finally:
-            conn.close()
-    # ------------------ Feed DB Setup End ------------------
+            await db.write(ingest_entries, [(feed_id, entries)], False)
+        except Exception as e:
+            print(f"[feed_add] DB ingest failed for {name} ({url}): {e}")
+            try:
+                await db.write(remove_feed, feed_id)
+            except Exception as exc:
+                # Still registered, so it's polled like any other feed and its first read stores the backlog
+                print(f"[feed_add] DB remove failed for {name} ({url}): {exc}")
+                self.feed_names[feed_id] = name
+                self.scheduler.schedule(feed_id, time.time())
+                await interaction.followup.send(f"Added **{name}**, but its entries couldn't be stored yet, they'll be read on the next poll.")
+                return
+            await interaction.followup.send(f"Couldn't store the entries of {url}, the feed wasn't added: {e}")
+            return
+        self.validators[url] = validators
+        self.feed_names[feed_id] = name
+        history = await db.read(publish_history, [feed_id], HISTORY_SIZE)
+        now = time.time()
+        next_poll = now + poll_interval(history.get(feed_id, []), now)
+        self.scheduler.schedule(feed_id, next_poll)
+        await interaction.followup.send(f"Added **{name}** with {len(entries)} entries, next poll <t:{int(next_poll)}:R>.")
+
+    # /feed remove - unregisters a feed and deletes its entries
+    @feed.command(name="remove", description="Unregister a news feed and delete its entries")
+    @app_commands.autocomplete(feed=feed_autocomplete)
+    async def feed_remove(self, interaction: discord.Interaction, feed: str):
+        row = await self.resolve_feed(interaction, feed)
+        if row is None:
+            return
+
+        feed_id, name, url = row
+        deleted = await db.write(remove_feed, feed_id)
+        self.scheduler.remove(feed_id)
+        self.failures.pop(feed_id, None)
+        self.feed_names.pop(feed_id, None)
+        self.validators.pop(url, None)
+        await interaction.response.send_message(f"Removed **{name}** and {deleted} stored entries.", ephemeral=True)
+
+    # /feed list - shows every registered feed
+    @feed.command(name="list", description="Show the registered news feeds")
+    async def feed_list(self, interaction: discord.Interaction):
+        rows = await db.read(list_feeds)
+        if not rows:
+            await interaction.response.send_message("No feeds are registered.", ephemeral=True)
+            return
+
+        lines = []
+        length = 0
+        for feed_id, name, url, style, retention_days, count, newest in rows:
+            newest_str = f"<t:{newest}:R>" if newest else "never"
+            next_poll = self.scheduler.next_poll(feed_id)
+            poll_str = f"<t:{int(next_poll)}:R>" if next_poll else "now"
+            kept_str = f"kept {retention_days} days" if retention_days else "kept for good"
+            line = (
+                f"**{name}** ({style or 'default'}) - {url}\n"
+                f"{count} entries ({kept_str}), newest {newest_str}, next poll {poll_str}"
+            )
+            if length + len(line) > FEED_LIST_LIMIT:
+                lines.append(f"...and {len(rows) - len(lines)} more")
+                break
+            lines.append(line)
+            length += len(line) + 1
+
+        embed = discord.Embed(title="News Feeds", description="\n".join(lines), color=discord.Color.dark_teal())
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    # /latest - pages through one feed's stored entries, newest first
+    @app_commands.command(name="latest", description="Browse the latest entries of a news feed")
+    @app_commands.describe(feed="Feed to browse", days="Only show entries from the past number of days")
+    @app_commands.autocomplete(feed=feed_autocomplete)
+    async def latest(self, interaction: discord.Interaction, feed: str, days: app_commands.Range[int, 1, 365] = None):
+        row = await self.resolve_feed(interaction, feed)
+        if row is None:
+            return
+
+        _, name, url = row
+        title = f"{name} - Past {days} Days" if days else f"{name} - Latest"
+        await self.send_recent(
+            interaction, url, days, title, discord.Color.dark_teal(), "Read/Listen", f"No recent entries from {name}."
+        )
+
+    # /search - searches one feed's stored entries
+    @app_commands.command(name="search", description="Search the entries of a news feed")
+    @app_commands.describe(feed="Feed to search", query='Search text, supports "phrases" and prefix* terms')
+    @app_commands.autocomplete(feed=feed_autocomplete)
+    async def search(self, interaction: discord.Interaction, feed: str, query: str):
+        row = await self.resolve_feed(interaction, feed)
+        if row is None:
+            return
+
+        _, name, url = row
+        await self.search_source(
+            interaction, url, query, f"{name} Search Results", f"{name} entries",
+            discord.Color.dark_teal(), "Read/Listen", "Link"
+        )
+    # ------------------ Feed Registry Commands End ------------------
+
+    # ------------------ News Commands ------------------
+    # /news - pages through every source's entries, newest first
+    @app_commands.command(name="news", description="Browse the latest entries from every news source")
+    async def news(self, interaction: discord.Interaction):
+        await interaction.response.defer()
+        params = {"title": "All Sources", "color": discord.Color.dark_teal().value, "link_label": "Read/Listen"}
+        embed, view = await open_pager("news", params)
+        if embed is None:
+            await interaction.followup.send("No news has been collected yet.")
+            return
+        await interaction.followup.send(embed=embed, view=view)
+    # ------------------ News Commands End ------------------
 
     # ------------------ PortSwigger Commands ------------------
     # /portarticles - shows all portswigger articles from a given a date
     @app_commands.command(name="portarticles", description="List PortSwigger research articles from the past 60 days")
     async def portarticles(self, interaction: discord.Interaction):
-        await interaction.response.defer()
-        articles = parse_feed(PORTSWIGGER_FEED)
-        recent = filter_recent(articles, 60)
-        if not recent:
-            await interaction.followup.send("No recent PortSwigger research articles.")
-            return
-        embed, view = make_paginated_view(recent, "PortSwigger Research - Past 60 Days", discord.Color.orange(), "Read")
-        await interaction.followup.send(embed=embed, view=view)
+        await self.send_recent(
+            interaction, PORTSWIGGER_FEED, 60, "PortSwigger Research - Past 60 Days", discord.Color.orange(), "Read",
+            "No recent PortSwigger research articles."
+        )
 
     # /portsearch - searches all portswigger articles for a given term
     @app_commands.command(name="portsearch", description="Search PortSwigger articles")
     async def portsearch(self, interaction: discord.Interaction, query: str):
-        await interaction.response.defer()
-        articles = parse_feed(PORTSWIGGER_FEED)
-        matches = [a for a in articles if query.lower() in a["title"].lower() or query.lower() in (a["summary"] or "").lower()]
-        if not matches:
-            await interaction.followup.send(f"No PortSwigger articles found matching: {query}")
-            return
-
-        def build_embed(article):
-            summary = clean_summary(article["summary"])
-            ts = int(article["published"].timestamp()) if article["published"] else None
-            published_str = f"<t:{ts}:F> (<t:{ts}:R>)" if ts else "Unknown"
-            embed = discord.Embed(title=article["title"], url=article["link"], description=summary, color=discord.Color.orange())
-            embed.add_field(name="Published", value=published_str, inline=False)
-            embed.add_field(name="Article Link", value=article["link"], inline=False)
-            return embed
-
-        if len(matches) > 1:
-            embeds = [build_embed(m) for m in matches]
-            embed, view = make_paginated_view(matches, "PortSwigger Search Results", discord.Color.orange(), "Read")
-            await interaction.followup.send(embed=embed, view=view)
-        else:
-            await interaction.followup.send(embed=build_embed(matches[0]))
+        await self.search_source(
+            interaction, PORTSWIGGER_FEED, query, "PortSwigger Search Results", "PortSwigger articles",
+            discord.Color.orange(), "Read", "Article Link"
+        )
     # ------------------ PortSwigger Commands End ------------------
 
     # ------------------ CyberWire Podcast Commands ------------------
     # /cyberepisodes - shows CyberWire Daily episodes from a given date
     @app_commands.command(name="cyberepisodes", description="List CyberWire Daily podcast episodes from the past 30 days")
     async def cyberepisodes(self, interaction: discord.Interaction):
-        await interaction.response.defer()
-        episodes = parse_feed(CYBERWIRE_FEED, include_audio=True)
-        recent = filter_recent(episodes, 7)
-        if not recent:
-            await interaction.followup.send("No recent CyberWire Daily episodes.")
-            return
-        embed, view = make_paginated_view(recent, "CyberWire Daily - Past 7 Days", discord.Color.blurple(), "Listen")
-        await interaction.followup.send(embed=embed, view=view)
+        await self.send_recent(
+            interaction, CYBERWIRE_FEED, 7, "CyberWire Daily - Past 7 Days", discord.Color.blurple(), "Listen",
+            "No recent CyberWire Daily episodes."
+        )
 
     # /cybersearch - searches all CyberWire Daily episodes for a given term
     @app_commands.command(name="cybersearch", description="Search CyberWire Daily podcast episodes")
     async def cybersearch(self, interaction: discord.Interaction, query: str):
-        await interaction.response.defer()
-        episodes = parse_feed(CYBERWIRE_FEED, include_audio=True)
-        matches = [e for e in episodes if query.lower() in e["title"].lower() or query.lower() in (e["summary"] or "").lower()]
-        if not matches:
-            await interaction.followup.send(f"No CyberWire Daily episodes found matching: {query}")
-            return
-
-        def build_embed(ep):
-            summary = clean_summary(ep["summary"]) 
-            ts = int(ep["published"].timestamp()) if ep["published"] else None
-            published_str = f"<t:{ts}:F> (<t:{ts}:R>)" if ts else "Unknown"
-            embed = discord.Embed(
-                title=ep["title"],
-                url=ep["link"],
-                description=summary,
-                color=discord.Color.blurple()
-            )
-            embed.add_field(name="Published", value=published_str, inline=False)
-            audio_val = ep["audio"] if ep["audio"] else ep["link"]
-            embed.add_field(name="Listen / Link", value=audio_val, inline=False)
-            return embed
-
-        if len(matches) > 1:
-            embed, view = make_paginated_view(matches, "CyberWire Daily Search Results", discord.Color.blurple(), "Listen")
-            await interaction.followup.send(embed=embed, view=view)
-        else:
-            await interaction.followup.send(embed=build_embed(matches[0]))
+        await self.search_source(
+            interaction, CYBERWIRE_FEED, query, "CyberWire Daily Search Results", "CyberWire Daily episodes",
+            discord.Color.blurple(), "Listen", "Listen / Link"
+        )
     # ------------------ CyberWire Podcast Commands End ------------------
 
     # ------------------ CTBB Podcast Commands ------------------
     # /ctbepisodes - shows all ctbb episodes from a given a date
     @app_commands.command(name="ctbepisodes", description="List CTBB podcast episodes from the past 30 days")
     async def ctbepisodes(self, interaction: discord.Interaction):
-        await interaction.response.defer()
-        episodes = parse_feed(CTBB_FEED, include_audio=True, )
-        recent = filter_recent(episodes, 30)
-        if not recent:
-            await interaction.followup.send("No recent CTBB episodes.")
-            return
-        embed, view = make_paginated_view(recent, "CTBB Podcast - Past 30 Days", discord.Color.brand_red(), "Listen")
-        await interaction.followup.send(embed=embed, view=view)
+        await self.send_recent(
+            interaction, CTBB_FEED, 30, "CTBB Podcast - Past 30 Days", discord.Color.brand_red(), "Listen",
+            "No recent CTBB episodes."
+        )
 
     # /ctbsearch - searches all ctbb episodes for a given term
     @app_commands.command(name="ctbsearch", description="Search CTBB podcast episodes")
     async def ctbsearch(self, interaction: discord.Interaction, query: str):
-        await interaction.response.defer()
-        episodes = parse_feed(CTBB_FEED, include_audio=True)
-        matches = [e for e in episodes if query.lower() in e["title"].lower() or query.lower() in (e["summary"] or "").lower()]
-        if not matches:
-            await interaction.followup.send(f"No CTBB episodes found matching: {query}")
-            return
-
-        def build_embed(ep):
-            summary = clean_ctbb_summary(ep["summary"]) 
-            ts = int(ep["published"].timestamp()) if ep["published"] else None
-            published_str = f"<t:{ts}:F> (<t:{ts}:R>)" if ts else "Unknown"
-            embed = discord.Embed(
-                title=ep["title"],
-                url=ep["link"],
-                description=summary,
-                color=discord.Color.purple()
-            )
-            embed.add_field(name="Published", value=published_str, inline=False)
-            audio_val = ep["audio"] if ep["audio"] else ep["link"]
-            embed.add_field(name="Listen / Link", value=audio_val, inline=False)
-            return embed
-
-        if len(matches) > 1:
-            embed, view = make_paginated_view(matches, "CTBB Search Results", discord.Color.brand_red(), "Listen")
-            await interaction.followup.send(embed=embed, view=view)
-        else:
-            await interaction.followup.send(embed=build_embed(matches[0]))
+        await self.search_source(
+            interaction, CTBB_FEED, query, "CTBB Search Results", "CTBB episodes",
+            discord.Color.brand_red(), "Listen", "Listen / Link"
+        )
     # ------------------ CTBB Podcast Commands End ------------------
     
 # Discord Setup
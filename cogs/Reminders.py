@@ -0,0 +1,159 @@
+# Imports
+import asyncio
+import time
+
+from .Metrics import metrics
+from .PollScheduler import PollScheduler
+from .Storage import db
+
+# ------------------ Reminder Stages ------------------
+# Seconds before the start each reminder goes out, in firing order
+REMINDER_STAGES = (24 * 60 * 60, 60 * 60, 0)
+
+# A reminder missed while the bot was down is still sent if it's at most this late
+REMINDER_GRACE = 15 * 60
+# A failed send is retried this often until it's past the grace window or out of attempts
+RETRY_DELAY = 60
+MAX_ATTEMPTS = 5
+
+def next_stage(start_time: int, sent: int, now: float) -> int:
+    '''
+    Finds the next reminder of a CTF that's still worth sending
+
+    Args:
+        start_time (int): Epoch the CTF starts at
+        sent (int): Reminders already sent, as stored in queue.reminders_sent
+        now (float): Current epoch
+
+    Returns:
+        int: Index into REMINDER_STAGES, len(REMINDER_STAGES) when nothing is left
+    '''
+
+    stage = sent
+    while stage < len(REMINDER_STAGES) and start_time - REMINDER_STAGES[stage] < now - REMINDER_GRACE:
+        stage += 1
+    return stage
+
+def reminder_text(name: str, start_time: int, link: str, stage: int) -> str:
+    if REMINDER_STAGES[stage] == 0:
+        return f"**{name}** is starting now! {link}"
+    return f"Reminder: **{name}** starts <t:{start_time}:R> (<t:{start_time}:F>) {link}"
+# ------------------ Reminder Stages End ------------------
+
+# ------------------ Reminder Scheduler ------------------
+class ReminderScheduler:
+    '''
+    Sends the T-24h, T-1h and start reminders of every queued CTF
+
+    Each CTF has one entry in a timer heap, keyed by its next reminder. The
+    task sleeps until the earliest one is due, so idle reminders cost nothing.
+    How many reminders were sent is kept in queue.reminders_sent, so a restart
+    carries on from the next one.
+    '''
+
+    def __init__(self, bot, channel_id):
+        self.bot = bot
+        self.channel_id = int(channel_id)
+        self.timers = PollScheduler()
+        self.reminders = {}  # ctf_name -> (start_time, link, stage)
+        self.attempts = {}   # ctf_name -> failed sends of its current reminder
+        self._task = None
+
+    def __len__(self):
+        return len(self.reminders)
+
+    async def load(self):
+        rows = await db.fetchall("SELECT ctf_name, start_time, link, reminders_sent FROM queue")
+        for name, start_time, link, sent in rows:
+            if start_time:
+                self.track(name, start_time, link, sent or 0)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    def track(self, name: str, start_time: int, link: str, sent: int = 0):
+        '''
+        Schedules the next reminder of a queued CTF, replacing any earlier schedule
+
+        Args:
+            name (str): Queue key of the CTF
+            start_time (int): Epoch the CTF starts at
+            link (str): CTFtime link shown in the reminder
+            sent (Optional [int]): Reminders already sent
+        '''
+
+        self.attempts.pop(name, None)
+        stage = next_stage(start_time, sent, time.time())
+        if stage >= len(REMINDER_STAGES):
+            self.untrack(name)
+            return
+        self.reminders[name] = (start_time, link, stage)
+        self.timers.schedule(name, start_time - REMINDER_STAGES[stage])
+
+    def untrack(self, name: str):
+        self.reminders.pop(name, None)
+        self.attempts.pop(name, None)
+        self.timers.remove(name)
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        while not self.bot.is_closed():
+            for name in await self.timers.wait_due():
+                try:
+                    await self.fire(name)
+                except Exception as e:
+                    print(f"[ReminderScheduler] reminder for {name} failed unexpectedly ({e})")
+
+    async def get_channel(self):
+        channel = self.bot.get_channel(self.channel_id)
+        if channel is None:
+            channel = await self.bot.fetch_channel(self.channel_id)
+        return channel
+
+    async def fire(self, name: str):
+        '''
+        Sends the due reminder of a CTF and schedules its next one
+        '''
+
+        reminder = self.reminders.get(name)
+        if reminder is None:
+            return
+
+        start_time, link, stage = reminder
+        # A retry that has fallen past the grace window moves on to the next reminder instead
+        if next_stage(start_time, stage, time.time()) != stage:
+            self.track(name, start_time, link, stage)
+            return
+
+        try:
+            channel = await self.get_channel()
+            with metrics.timer("discord_send"):
+                await channel.send(reminder_text(name, start_time, link, stage))
+        except Exception as e:
+            attempts = self.attempts.get(name, 0) + 1
+            if attempts >= MAX_ATTEMPTS:
+                print(f"[ReminderScheduler] reminder for {name} failed ({e}), giving up after {attempts} attempts")
+                # Saved like a sent reminder, so a restart doesn't retry it again
+                self.track(name, start_time, link, stage + 1)
+                await self.save_sent(name, start_time, stage + 1)
+                return
+            print(f"[ReminderScheduler] reminder for {name} failed ({e}), retrying in {RETRY_DELAY}s")
+            self.attempts[name] = attempts
+            self.timers.schedule(name, time.time() + RETRY_DELAY)
+            return
+
+        metrics.incr("reminders", stage=str(REMINDER_STAGES[stage]))
+        # Scheduled before saving, so a failed write can't stop the CTF's later reminders
+        self.track(name, start_time, link, stage + 1)
+        await self.save_sent(name, start_time, stage + 1)
+
+    async def save_sent(self, name: str, start_time: int, sent: int):
+        # Matching on start_time too keeps a re-added CTF's fresh count from being overwritten
+        await db.execute(
+            "UPDATE queue SET reminders_sent = ? WHERE ctf_name = ? AND start_time = ?", (sent, name, start_time)
+        )
+# ------------------ Reminder Scheduler End ------------------
@@ -0,0 +1,102 @@
+# Imports
+import discord
+
+from discord.ext import commands
+from discord import app_commands
+
+# Token
+from BotOfSin import GUILD_ID, CONFIG
+from .Metrics import metrics, record_command, render_prometheus, HISTOGRAM_WINDOW
+
+# ------------------ Stats Setup ------------------
+# The Prometheus endpoint only starts when METRICS_PORT is set in config.json
+METRICS_HOST = "127.0.0.1"
+STATS_DESCRIPTION_LIMIT = 4000
+
+def label_suffix(labels) -> str:
+    return " " + ",".join(str(v) for _, v in labels) if labels else ""
+
+def format_stats() -> str:
+    '''
+    Renders the timers and counters as a fixed-width table for /stats
+
+    Returns:
+        str: Code block with one line per timer and counter
+    '''
+
+    lines = [f"{'timer':<32} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8}"]
+    for (name, labels), histogram in sorted(metrics.timers.items()):
+        p50, p95, p99 = (q * 1000 for q in histogram.quantiles())
+        label = (name + label_suffix(labels))[:32]
+        lines.append(f"{label:<32} {histogram.count:>6} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f}")
+
+    if metrics.counters:
+        lines.append("")
+        lines.append(f"{'counter':<32} {'value':>6}")
+        for (name, labels), value in sorted(metrics.counters.items()):
+            label = (name + label_suffix(labels))[:32]
+            lines.append(f"{label:<32} {value:>6}")
+
+    text = "\n".join(lines)
+    if len(text) > STATS_DESCRIPTION_LIMIT:
+        text = text[:STATS_DESCRIPTION_LIMIT].rsplit("\n", 1)[0] + "\n..."
+    return f"```\n{text}\n```"
+# ------------------ Stats Setup End ------------------
+
+# ------------------ Stats Cog ------------------
+class StatsCommands(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self._runner = None
+
+    async def cog_load(self):
+        port = CONFIG.get("METRICS_PORT")
+        if port:
+            self._runner = await self.start_metrics_server(CONFIG.get("METRICS_HOST", METRICS_HOST), int(port))
+
+    async def cog_unload(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def start_metrics_server(self, host: str, port: int):
+        '''
+        Serves the metrics in Prometheus text format on /metrics
+
+        Args:
+            host (str): Interface to bind, local only by default
+            port (int): Port to bind
+
+        Returns:
+            web.AppRunner: Runner to clean up on unload
+        '''
+
+        # Only imported when the endpoint is enabled
+        from aiohttp import web
+
+        async def handle(request):
+            return web.Response(text=render_prometheus(metrics), content_type="text/plain", charset="utf-8")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        print(f"[Stats] metrics served on http://{host}:{port}/metrics")
+        return runner
+
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        record_command(interaction, command)
+
+    # /stats - latency percentiles and counters since startup
+    @app_commands.command(name="stats", description="Show bot latency and cache statistics")
+    @app_commands.default_permissions(administrator=True)
+    async def stats(self, interaction: discord.Interaction):
+        embed = discord.Embed(title="Bot Stats (ms)", description=format_stats(), color=discord.Color.dark_grey())
+        embed.set_footer(text=f"Percentiles over the last {HISTOGRAM_WINDOW} samples per timer")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+# ------------------ Stats Cog End ------------------
+
+# Discord Setup
+async def setup(bot):
+    await bot.add_cog(StatsCommands(bot), guild=discord.Object(id=GUILD_ID))
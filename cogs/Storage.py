@@ -0,0 +1,430 @@
+# Imports
+import asyncio
+import os
+import sqlite3
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from .DateUtils import parse_date
+from .Fingerprint import BAND_COUNT
+from .Metrics import metrics
+
+# ------------------ Storage Setup ------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, "ctfs.db")
+
+READ_WORKERS = 4
+MAX_WRITE_BATCH = 64
+
+class Storage:
+    '''
+    Shared SQLite access for every cog
+
+    The DB runs in WAL mode so readers never wait on the writer. Reads run on a
+    small thread pool with one connection per thread. Writes are queued to a
+    single writer thread that commits whatever is waiting in one transaction,
+    with a savepoint per write so a failing write doesn't take the batch down.
+    Callables passed to read/write get a connection as their first argument
+    and must not commit themselves.
+    '''
+
+    def __init__(self, path: str = DB_PATH, readers: int = READ_WORKERS):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+        self._queue = None
+        self._writer_task = None
+        self._start_lock = None
+
+    # Connections
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode, transactions are opened explicitly by the writer
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    # Lifecycle
+    async def start(self):
+        '''
+        Creates or migrates the schema and starts the writer, safe to call from every cog
+        '''
+
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._writer_task is not None:
+                return
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._writer, self._run_batch, [(init_schema, (), None)])
+            self._queue = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._writer_loop())
+
+    async def close(self):
+        '''
+        Stops the writer and closes every connection
+        '''
+
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
+
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    # Reads
+    async def read(self, fn, *args):
+        '''
+        Runs fn(conn, *args) on the read pool
+
+        Args:
+            fn (callable): Function doing the reads
+            *args: Extra arguments for fn
+
+        Returns:
+            Whatever fn returns
+        '''
+
+        loop = asyncio.get_running_loop()
+        with metrics.timer("db_read", op=fn.__name__):
+            return await loop.run_in_executor(self._readers, lambda: fn(self._connection(), *args))
+
+    async def fetchall(self, sql: str, params=()):
+        def fetchall(conn):
+            return conn.execute(sql, params).fetchall()
+        return await self.read(fetchall)
+
+    async def fetchone(self, sql: str, params=()):
+        def fetchone(conn):
+            return conn.execute(sql, params).fetchone()
+        return await self.read(fetchone)
+
+    # Writes
+    async def write(self, fn, *args):
+        '''
+        Queues fn(conn, *args) for the writer and waits for its transaction to commit
+
+        Args:
+            fn (callable): Function doing the writes
+            *args: Extra arguments for fn
+
+        Returns:
+            Whatever fn returns
+        '''
+
+        if self._writer_task is None:
+            raise RuntimeError("Storage.start() must be awaited before writing")
+        # Includes the wait for the writer, which is what callers actually feel
+        with metrics.timer("db_write", op=fn.__name__):
+            future = asyncio.get_running_loop().create_future()
+            await self._queue.put((fn, args, future))
+            return await future
+
+    async def execute(self, sql: str, params=()):
+        '''
+        Queues a single statement for the writer
+
+        Returns:
+            int: Number of rows changed by the statement
+        '''
+
+        def execute(conn):
+            return conn.execute(sql, params).rowcount
+        return await self.write(execute)
+
+    async def _writer_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < MAX_WRITE_BATCH and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                with metrics.timer("db_batch"):
+                    results = await loop.run_in_executor(self._writer, self._run_batch, batch)
+                metrics.incr("db_batched_writes", len(batch))
+            except Exception as e:
+                results = [(None, e)] * len(batch)
+
+            for (_, _, future), (result, error) in zip(batch, results):
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    def _run_batch(self, batch):
+        conn = self._connection()
+        results = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for fn, args, _ in batch:
+                conn.execute("SAVEPOINT write_job")
+                try:
+                    results.append((fn(conn, *args), None))
+                    conn.execute("RELEASE write_job")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_job")
+                    conn.execute("RELEASE write_job")
+                    results.append((None, e))
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+        # Surface failures of the schema setup, which runs without a future
+        for (_, _, future), (_, error) in zip(batch, results):
+            if future is None and error is not None:
+                raise error
+        return results
+
+db = Storage()
+# ------------------ Storage Setup End ------------------
+
+# ------------------ Schema ------------------
+# retention_days used to default to this, before retention became opt-in per feed
+OLD_DEFAULT_RETENTION_DAYS = 90
+RETENTION_OPT_IN_KEY = "retention_opt_in"
+
+# One indexed column per SimHash band, see Fingerprint.py
+BAND_COLUMNS = ",\n    ".join(f"simhash_band{band} INTEGER" for band in range(BAND_COUNT))
+
+ENTRIES_SCHEMA = f"""CREATE TABLE IF NOT EXISTS {{name}} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    feed_id INTEGER,
+    guid TEXT,
+    title TEXT,
+    link TEXT,
+    summary TEXT,
+    published INTEGER,
+    audio TEXT,
+    posted INTEGER DEFAULT 0,
+    summary_text TEXT,
+    link_key TEXT,
+    simhash INTEGER,
+    {BAND_COLUMNS},
+    duplicate_of INTEGER
+)"""
+ENTRY_COLUMNS = "id, feed_id, guid, title, link, summary, published, audio, posted, summary_text"
+
+def init_schema(conn: sqlite3.Connection):
+    '''
+    Creates every table and index the bot uses and migrates older layouts
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+    '''
+
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS queue (
+            ctf_name TEXT PRIMARY KEY,
+            start_time INTEGER,
+            link TEXT,
+            reminders_sent INTEGER DEFAULT 0
+        )"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS ctf_events (
+            link TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            summary TEXT,
+            start_time INTEGER,
+            weight TEXT,
+            format TEXT,
+            official_url TEXT,
+            updated_at INTEGER
+        )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_ctf_events_start ON ctf_events (start_time)")
+    conn.execute(
+        f"""CREATE TABLE IF NOT EXISTS feeds (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            url TEXT NOT NULL UNIQUE,
+            retention_days INTEGER,
+            last_guid TEXT,
+            last_published INTEGER,
+            summary_style TEXT
+        )"""
+    )
+    conn.execute(ENTRIES_SCHEMA.format(name="entries"))
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS pagers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            params TEXT NOT NULL,
+            created_at INTEGER
+        )"""
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pagers_created ON pagers (created_at)")
+    conn.execute("CREATE TABLE IF NOT EXISTS bot_state (key TEXT PRIMARY KEY, value TEXT)")
+    # Forum thread made for each queued CTF, digest is a hash of what the thread shows
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS ctf_threads (
+            ctf_name TEXT PRIMARY KEY,
+            thread_id INTEGER NOT NULL,
+            digest TEXT,
+            updated_at INTEGER
+        )"""
+    )
+    migrate_feed_db(conn)
+
+    # Older tables may hold duplicate guids, keep the first copy so the unique index can be built
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_entries_guid'").fetchone():
+        conn.execute("DELETE FROM entries WHERE rowid NOT IN (SELECT MIN(rowid) FROM entries GROUP BY guid)")
+        conn.execute("CREATE UNIQUE INDEX idx_entries_guid ON entries (guid)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_feed_published ON entries (feed_id, published)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_published ON entries (published, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_unposted ON entries (published, id) WHERE posted = 0")
+    # Duplicate lookups, see Fingerprint.py. Each is an equality match followed by a published range
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_link_key ON entries (link_key, published)")
+    for band in range(BAND_COUNT):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_entries_band{band} ON entries (simhash_band{band}, published)")
+    init_search_index(conn)
+
+def init_search_index(conn: sqlite3.Connection):
+    '''
+    Creates the FTS5 mirror of entries and the triggers that keep it in sync
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+    '''
+
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'entries_fts'").fetchone()
+    if not exists:
+        conn.execute(
+            """CREATE VIRTUAL TABLE entries_fts USING fts5(
+                title, summary, content='entries', content_rowid='id', tokenize='porter unicode61'
+            )"""
+        )
+        # Index whatever was ingested before the search index existed
+        conn.execute("INSERT INTO entries_fts (entries_fts) VALUES ('rebuild')")
+
+    conn.execute(
+        """CREATE TRIGGER IF NOT EXISTS entries_fts_insert AFTER INSERT ON entries BEGIN
+            INSERT INTO entries_fts (rowid, title, summary) VALUES (new.id, new.title, new.summary);
+        END"""
+    )
+    conn.execute(
+        """CREATE TRIGGER IF NOT EXISTS entries_fts_delete AFTER DELETE ON entries BEGIN
+            INSERT INTO entries_fts (entries_fts, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary);
+        END"""
+    )
+    conn.execute(
+        """CREATE TRIGGER IF NOT EXISTS entries_fts_update AFTER UPDATE OF title, summary ON entries BEGIN
+            INSERT INTO entries_fts (entries_fts, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary);
+            INSERT INTO entries_fts (rowid, title, summary) VALUES (new.id, new.title, new.summary);
+        END"""
+    )
+
+def migrate_feed_db(conn: sqlite3.Connection):
+    '''
+    Brings tables created by older versions up to the current schema
+
+    Args:
+        conn (sqlite3.Connection): Connection to the bot DB
+    '''
+
+    # How many of the CTF's reminders have gone out, see Reminders.REMINDER_STAGES
+    queue_columns = {row[1] for row in conn.execute("PRAGMA table_info(queue)")}
+    if "reminders_sent" not in queue_columns:
+        conn.execute("ALTER TABLE queue ADD COLUMN reminders_sent INTEGER DEFAULT 0")
+
+    ctf_columns = {row[1] for row in conn.execute("PRAGMA table_info(ctf_events)")}
+    for column in ("weight", "format"):
+        if column not in ctf_columns:
+            conn.execute(f"ALTER TABLE ctf_events ADD COLUMN {column} TEXT")
+
+    feed_columns = {row[1] for row in conn.execute("PRAGMA table_info(feeds)")}
+    # NULL keeps a feed's entries for good, so search covers everything ever read.
+    # Every feed had the old default, nothing could set another value, so it's cleared once
+    if "retention_days" not in feed_columns:
+        conn.execute("ALTER TABLE feeds ADD COLUMN retention_days INTEGER")
+    if get_state(conn, RETENTION_OPT_IN_KEY) is None:
+        conn.execute("UPDATE feeds SET retention_days = NULL WHERE retention_days = ?", (OLD_DEFAULT_RETENTION_DAYS,))
+        set_state(conn, RETENTION_OPT_IN_KEY, "1")
+    # High-water mark of the incremental parser
+    if "last_guid" not in feed_columns:
+        conn.execute("ALTER TABLE feeds ADD COLUMN last_guid TEXT")
+    if "last_published" not in feed_columns:
+        conn.execute("ALTER TABLE feeds ADD COLUMN last_published INTEGER")
+    if "summary_style" not in feed_columns:
+        conn.execute("ALTER TABLE feeds ADD COLUMN summary_style TEXT")
+
+    # Cleaned summary text, filled in at ingest and backfilled by backfill_summary_text
+    entry_types = {row[1]: row[2].upper() for row in conn.execute("PRAGMA table_info(entries)")}
+    if "summary_text" not in entry_types:
+        conn.execute("ALTER TABLE entries ADD COLUMN summary_text TEXT")
+    # Content fingerprints, filled in at ingest and backfilled by backfill_fingerprints
+    fingerprint_columns = {"link_key": "TEXT", "simhash": "INTEGER", "duplicate_of": "INTEGER"}
+    fingerprint_columns.update({f"simhash_band{band}": "INTEGER" for band in range(BAND_COUNT)})
+    for column, kind in fingerprint_columns.items():
+        if column not in entry_types:
+            conn.execute(f"ALTER TABLE entries ADD COLUMN {column} {kind}")
+
+    # published used to be an ISO string, rebuild the table with integer epochs
+    if entry_types.get("published") == "INTEGER":
+        return
+
+    conn.execute("DROP TABLE IF EXISTS entries_migrated")
+    conn.execute(ENTRIES_SCHEMA.format(name="entries_migrated"))
+    rows = []
+    for row in conn.execute(f"SELECT {ENTRY_COLUMNS} FROM entries"):
+        row = list(row)
+        row[6] = to_epoch(row[6])
+        rows.append(row)
+    conn.executemany(f"INSERT INTO entries_migrated ({ENTRY_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.execute("DROP TABLE entries")
+    conn.execute("ALTER TABLE entries_migrated RENAME TO entries")
+
+def to_epoch(published):
+    '''
+    Converts a stored published value to an integer epoch
+
+    Args:
+        published: ISO string, epoch number or None
+
+    Returns:
+        int: Seconds since the epoch, or None if the value can't be parsed
+    '''
+
+    if published is None or isinstance(published, int):
+        return published
+    try:
+        return int(float(published))
+    except ValueError:
+        pass
+    dt = parse_date(published)
+    return int(dt.timestamp()) if dt else None
+# ------------------ Schema End ------------------
+
+# ------------------ Bot State ------------------
+def get_state(conn: sqlite3.Connection, key: str):
+    row = conn.execute("SELECT value FROM bot_state WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+def set_state(conn: sqlite3.Connection, key: str, value: str):
+    conn.execute(
+        "INSERT INTO bot_state (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+        (key, value),
+    )
+# ------------------ Bot State End ------------------
@@ -0,0 +1,176 @@
+# Imports
+import re
+
+from dataclasses import dataclass
+from html import unescape
+
+# ------------------ Summary Styles ------------------
+NO_SUMMARY = "No summary available."
+
+# Length of the text stored at ingest, what the embeds show
+SUMMARY_LENGTH = 800
+
+@dataclass(frozen=True, slots=True)
+class SummaryStyle:
+    '''
+    Per-source tweaks to the HTML to text conversion
+
+    footer is matched against each line of text, everything from the match
+    onwards is dropped. compact keeps single line breaks between paragraphs.
+    '''
+
+    footer: re.Pattern = None
+    compact: bool = False
+
+# Keyed by feeds.summary_style, None and unknown names use "default"
+SUMMARY_STYLES = {
+    "default": SummaryStyle(),
+    # CTBB show notes end with a ==== line followed by sponsor and social links
+    "ctbb": SummaryStyle(footer=re.compile(r"={2,}"), compact=True),
+}
+# ------------------ Summary Styles End ------------------
+
+# ------------------ HTML To Text ------------------
+BLOCK_TAGS = frozenset((
+    "p", "div", "section", "article", "header", "footer", "blockquote", "pre", "ul", "ol", "dl",
+    "table", "h1", "h2", "h3", "h4", "h5", "h6", "figure", "hr",
+))
+LINE_TAGS = frozenset(("br", "li", "tr", "dt", "dd"))
+SKIP_TAGS = frozenset(("script", "style", "template"))
+
+# One token per match: a tag (closing slash and name captured), a comment or declaration, or a run of text.
+# A < that starts none of those is text
+TOKEN_PATTERN = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9]*)[^>]*>|<!--.*?-->|<[!?][^>]*>|([^<]+|<)", re.DOTALL)
+LINE_BREAK_PATTERN = re.compile(r"(\s*\n\s*)")
+
+class SummaryConverter:
+    '''
+    Single pass HTML to plain text converter
+
+    The summary is scanned token by token, entities are decoded per text run,
+    whitespace is collapsed as text arrives and block tags become line breaks,
+    so the output never needs another pass. Scanning stops as soon as the text
+    reaches max_length or the style's footer, so long show notes are never
+    read to the end.
+    '''
+
+    def __init__(self, style: SummaryStyle, max_length: int = None):
+        self.style = style
+        self.max_length = max_length
+        self.parts = []
+        self.length = 0
+        self.line = ""       # Text since the last line break, where the footer is looked for
+        self.breaks = 0      # Line breaks owed before the next text, 2 for a paragraph
+        self.space = False   # A space is owed before the next text
+        self.done = False
+        self.truncated = False
+
+    def convert(self, html: str) -> str:
+        pos = 0
+        end = len(html)
+        match_token = TOKEN_PATTERN.match
+        while pos < end and not self.done:
+            match = match_token(html, pos)
+            pos = match.end()
+            closing, tag, text = match.groups()
+            if text is not None:
+                self.handle_text(unescape(text) if "&" in text else text)
+                continue
+            if tag is None:
+                continue
+
+            tag = tag.lower()
+            if tag in BLOCK_TAGS:
+                self.newline(2)
+            elif tag in LINE_TAGS:
+                self.newline(1)
+                if tag == "li" and not closing:
+                    self.emit("• ")
+            elif tag in SKIP_TAGS and not closing:
+                # Jump past the element's content, or to the end if it's never closed
+                close = html.lower().find(f"</{tag}", pos)
+                pos = end if close < 0 else close
+        return self.text()
+
+    def handle_text(self, data: str):
+        if "\n" not in data:
+            self.emit(data)
+            return
+        # Feeds without markup rely on raw newlines, a blank line is a paragraph break
+        for i, piece in enumerate(LINE_BREAK_PATTERN.split(data)):
+            if i % 2:
+                self.newline(2 if piece.count("\n") > 1 else 1)
+            elif piece:
+                self.emit(piece)
+
+    def newline(self, count: int):
+        self.breaks = max(self.breaks, count)
+        self.space = False
+
+    def emit(self, text: str):
+        # Whitespace runs collapse to one space, leading or trailing ones are owed to the neighbouring text
+        if self.done:
+            return
+        words = text.split()
+        if text[0].isspace():
+            self.space = True
+        if not words:
+            return
+        stripped = " ".join(words)
+
+        separator = ""
+        if self.length:
+            if self.breaks:
+                separator = "\n" if self.style.compact else "\n" * self.breaks
+            elif self.space:
+                separator = " "
+        if self.breaks:
+            self.line = ""
+        self.breaks = 0
+        self.space = text[-1].isspace()
+        self.line += (" " if separator == " " else "") + stripped
+        chunk = separator + stripped
+
+        if self.style.footer is not None:
+            match = self.style.footer.search(self.line)
+            if match:
+                # The footer may have started in earlier text of the same line
+                text = "".join(self.parts) + chunk
+                self.parts = [text[:len(text) - (len(self.line) - match.start())].rstrip()]
+                self.length = len(self.parts[0])
+                self.done = True
+                return
+
+        if self.max_length is not None and self.length + len(chunk) > self.max_length:
+            self.parts.append(chunk[:self.max_length - self.length])
+            self.length = self.max_length
+            self.truncated = True
+            self.done = True
+            return
+        self.parts.append(chunk)
+        self.length += len(chunk)
+
+    def text(self) -> str:
+        text = "".join(self.parts)
+        if not text:
+            return NO_SUMMARY
+        return text + "..." if self.truncated else text
+
+def summary_to_text(summary: str, style: str = None, max_length: int = SUMMARY_LENGTH) -> str:
+    '''
+    Converts an HTML or plain text summary to the text shown in embeds
+
+    Args:
+        summary (str): Summary as written in the feed
+        style (Optional [str]): Key of SUMMARY_STYLES, usually the feed's summary_style
+        max_length (Optional [int]): Length the text is cut at, None for no limit
+
+    Returns:
+        str: Plain text, ending in "..." when it was cut short
+    '''
+
+    if not summary:
+        return NO_SUMMARY
+
+    return SummaryConverter(SUMMARY_STYLES.get(style) or SUMMARY_STYLES["default"], max_length).convert(summary)
+# ------------------ HTML To Text End ------------------
@@ -0,0 +1,132 @@
+# Imports
+import heapq
+import re
+
+from bisect import bisect_left, insort
+
+# ------------------ Title Index ------------------
+TOKEN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str):
+    return TOKEN.findall(text.lower())
+
+class TitleIndex:
+    '''
+    In-memory prefix index over titles, used to answer autocomplete
+
+    Every title is indexed under each of its words and under the whole
+    normalised title, in one sorted list searched with bisect. A query matches
+    a title when each query word is a prefix of one of the title's words.
+    Adding, updating and removing a title only touches that title's tokens.
+    '''
+
+    def __init__(self):
+        self._titles = {}   # key -> (title, order)
+        self._tokens = {}   # key -> tokens the key is indexed under
+        self._phrases = {}  # key -> normalised whole title
+        self._sorted = []   # sorted (token, key) pairs
+
+    def __len__(self):
+        return len(self._titles)
+
+    def __contains__(self, key):
+        return key in self._titles
+
+    def get(self, key):
+        return self._titles[key]
+
+    def add(self, key, title: str, order=0):
+        '''
+        Indexes a title, replacing whatever was indexed under the key
+
+        Args:
+            key: Value handed back by search, must be sortable
+            title (str): Text to index
+            order (Optional): Tie breaker between equally good matches, lower first
+        '''
+
+        if self._titles.get(key) == (title, order):
+            return
+        self.remove(key)
+
+        words = tokenize(title)
+        phrase = " ".join(words)
+        tokens = set(words)
+        if words:
+            tokens.add(phrase)
+        self._titles[key] = (title, order)
+        self._tokens[key] = tokens
+        self._phrases[key] = phrase
+        for token in tokens:
+            insort(self._sorted, (token, key))
+
+    def remove(self, key):
+        '''
+        Drops a key from the index if present
+
+        Args:
+            key: Key passed to add
+        '''
+
+        if key not in self._titles:
+            return
+        for token in self._tokens.pop(key):
+            i = bisect_left(self._sorted, (token, key))
+            if i < len(self._sorted) and self._sorted[i] == (token, key):
+                del self._sorted[i]
+        del self._titles[key]
+        del self._phrases[key]
+
+    def sync(self, items):
+        '''
+        Makes the index match the given items, only touching what changed
+
+        Args:
+            items (list): (key, title, order) tuples
+        '''
+
+        seen = set()
+        for key, title, order in items:
+            seen.add(key)
+            self.add(key, title, order)
+        for key in [k for k in self._titles if k not in seen]:
+            self.remove(key)
+
+    def _range(self, prefix: str):
+        # Every token starting with prefix sorts between prefix and prefix + U+FFFF
+        lo = bisect_left(self._sorted, (prefix,))
+        hi = bisect_left(self._sorted, (prefix + "\uffff",), lo)
+        return lo, hi
+
+    def search(self, query: str, limit: int = 25):
+        '''
+        Finds titles matching the query
+
+        Args:
+            query (str): Text typed so far
+            limit (Optional [int]): Maximum number of keys returned
+
+        Returns:
+            list: Matching keys, whole-title prefix matches first, then by order
+        '''
+
+        words = tokenize(query)
+        if not words:
+            return heapq.nsmallest(limit, self._titles, key=lambda k: (self._titles[k][1], k))
+
+        # Candidates come from the word with the fewest matching tokens, the rest are checked per key
+        ranges = sorted(((self._range(w), w) for w in set(words)), key=lambda r: r[0][1] - r[0][0])
+        lo, hi = ranges[0][0]
+        candidates = {key for _, key in self._sorted[lo:hi]}
+        rest = [w for _, w in ranges[1:]]
+        matches = [
+            key for key in candidates
+            if all(any(token.startswith(w) for token in self._tokens[key]) for w in rest)
+        ]
+
+        phrase = " ".join(tokenize(query))
+        def rank(key):
+            return (not self._phrases[key].startswith(phrase), self._titles[key][1], key)
+
+        return heapq.nsmallest(limit, matches, key=rank)
+# ------------------ Title Index End ------------------
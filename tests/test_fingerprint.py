@@ -0,0 +1,64 @@
+# Imports
+import sqlite3
+
+from datetime import datetime, timezone
+from cogs.FeedStore import ingest_entries
+from cogs.Models import FeedEntry
+from cogs.Storage import init_schema
+
+# ------------------ Helpers ------------------
+# Network boilerplate every show appends to its notes, several times longer than the notes themselves
+NETWORK_FOOTER = (
+    "Thanks for listening to another show from the Example Security Network. Our network publishes "
+    "daily news, weekly interviews and monthly deep dives on offensive security, bug bounty hunting, "
+    "cloud security and threat intelligence. Find every show wherever you get your podcasts, join the "
+    "community chat at example.com/chat and tell a friend about us. Support the network at example.com/support "
+    "where members get ad free episodes, early access and bonus content every single week of the year. "
+    "Our hosts have spent years hunting bugs, building tools and teaching others, so every show brings "
+    "practical advice you can use on your next engagement, report or research project."
+)
+PUBLISHED = datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+
+def make_db():
+    conn = sqlite3.connect(":memory:")
+    init_schema(conn)
+    conn.executemany("INSERT INTO feeds (id, name, url) VALUES (?, ?, ?)", [(1, "Show A", "a"), (2, "Show B", "b")])
+    return conn
+
+def episode(guid: str, title: str, notes: str, footer: str = NETWORK_FOOTER):
+    return FeedEntry(
+        title=title, link=f"https://{guid}.example.org/", summary=f"<p>{notes}</p><p>{footer}</p>", published=PUBLISHED, guid=guid
+    )
+
+def duplicates(conn):
+    return dict(conn.execute("SELECT guid, duplicate_of FROM entries WHERE duplicate_of IS NOT NULL"))
+# ------------------ Helpers End ------------------
+
+# ------------------ Duplicate Detection ------------------
+def test_shared_footer_is_not_a_duplicate():
+    conn = make_db()
+    ingest_entries(conn, [(1, [episode("a1", "Fuzzing the Linux kernel", "Syzkaller tips.")])])
+    ingest_entries(conn, [(2, [episode("b1", "Abusing OAuth redirects", "Account takeover.")])])
+
+    assert duplicates(conn) == {}
+    assert conn.execute("SELECT posted FROM entries WHERE guid = 'b1'").fetchone()[0] == 0
+
+def test_marked_footer_is_not_a_duplicate():
+    footer = "====================<br>Sponsored by Example Corp. " + NETWORK_FOOTER
+    conn = make_db()
+    ingest_entries(conn, [(1, [episode("a1", "Episode 12: Race conditions", "Racing a web app.", footer)])])
+    ingest_entries(conn, [(2, [episode("b1", "Episode 13: Race to the cloud", "Cloud migration stories.", footer)])])
+
+    assert duplicates(conn) == {}
+
+def test_reworded_story_is_a_duplicate():
+    story = (
+        "Google has released an emergency Chrome update fixing a zero-day vulnerability in the V8 "
+        "JavaScript engine that attackers exploited in the wild against journalists and activists."
+    )
+    conn = make_db()
+    ingest_entries(conn, [(1, [episode("a1", "Google patches exploited Chrome zero-day", story, "")])])
+    ingest_entries(conn, [(2, [episode("b1", "Chrome zero-day exploited in the wild, patch now", story + " Update today.", "")])])
+
+    assert duplicates(conn) == {"b1": conn.execute("SELECT id FROM entries WHERE guid = 'a1'").fetchone()[0]}
+# ------------------ Duplicate Detection End ------------------